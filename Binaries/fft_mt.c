@@ -0,0 +1,92 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#include <pthread.h>
+
+#define N 1024   // FFT size (must be power of 2)
+#define PI 3.14159265358979323846
+
+typedef struct {
+    double re, im;
+} complex_t;
+
+typedef struct {
+    complex_t *a;
+    int n;
+    int depth;
+} fft_arg_t;
+
+void fft(complex_t *a, int n, int depth);
+
+void *fft_thread(void *p) {
+    fft_arg_t *arg = (fft_arg_t *)p;
+    fft(arg->a, arg->n, arg->depth);
+    return NULL;
+}
+
+// depth > 0: the even half is handed to a new thread, so a run with
+// depth d uses 2^d threads in total
+void fft(complex_t *a, int n, int depth) {
+    if (n <= 1) return;
+
+    // Divide
+    complex_t *even = malloc(n/2 * sizeof(complex_t));
+    complex_t *odd  = malloc(n/2 * sizeof(complex_t));
+    for (int i = 0; i < n/2; i++) {
+        even[i] = a[i*2];
+        odd[i]  = a[i*2 + 1];
+    }
+
+    // Conquer
+    if (depth > 0) {
+        pthread_t tid;
+        fft_arg_t arg = {even, n/2, depth - 1};
+        pthread_create(&tid, NULL, fft_thread, &arg);
+        fft(odd, n/2, depth - 1);
+        pthread_join(tid, NULL);
+    } else {
+        fft(even, n/2, 0);
+        fft(odd, n/2, 0);
+    }
+
+    // Combine
+    for (int k = 0; k < n/2; k++) {
+        double t = -2 * PI * k / n;
+        complex_t wk = {cos(t), sin(t)};
+        complex_t oddk = {wk.re * odd[k].re - wk.im * odd[k].im,
+                          wk.re * odd[k].im + wk.im * odd[k].re};
+        a[k].re       = even[k].re + oddk.re;
+        a[k].im       = even[k].im + oddk.im;
+        a[k + n/2].re = even[k].re - oddk.re;
+        a[k + n/2].im = even[k].im - oddk.im;
+    }
+
+    free(even);
+    free(odd);
+}
+
+int main(int argc, char **argv) {
+    int nthreads = 4;   // override with argv[1]; run gem5 with --num_cpus >= nthreads
+    int depth = 0;
+
+    if (argc > 1) nthreads = atoi(argv[1]);
+    while ((2 << depth) <= nthreads && (N >> (depth + 1)) > 1)
+        depth++;
+
+    complex_t *a = malloc(N * sizeof(complex_t));
+
+    // Initialize input
+    for (int i = 0; i < N; i++) {
+        a[i].re = cos(2 * PI * i / N);
+        a[i].im = sin(2 * PI * i / N);
+    }
+
+    // Run FFT (uses the largest power of two <= nthreads)
+    fft(a, N, depth);
+
+    // Print one value
+    printf("FFT[0] = %f + %fi\n", a[0].re, a[0].im);
+
+    free(a);
+    return 0;
+}
@@ -0,0 +1,56 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <pthread.h>
+
+#define N 512   // matrix size (adjust as needed)
+#define MAX_THREADS 64
+
+double A[N][N], B[N][N], C[N][N];
+
+int nthreads = 4;   // override with argv[1]; run gem5 with --num_cpus >= nthreads
+
+// Each thread multiplies a contiguous block of rows: C[lo..hi) = A[lo..hi) * B
+void *worker(void *arg) {
+    long id = (long)arg;
+    int lo = id * N / nthreads;
+    int hi = (id + 1) * N / nthreads;
+
+    for (int i = lo; i < hi; i++) {
+        for (int j = 0; j < N; j++) {
+            double sum = 0.0;
+            for (int k = 0; k < N; k++) {
+                sum += A[i][k] * B[k][j];
+            }
+            C[i][j] = sum;
+        }
+    }
+    return NULL;
+}
+
+int main(int argc, char **argv) {
+    pthread_t threads[MAX_THREADS];
+
+    if (argc > 1) nthreads = atoi(argv[1]);
+    if (nthreads < 1) nthreads = 1;
+    if (nthreads > MAX_THREADS) nthreads = MAX_THREADS;
+
+    // Initialize matrices
+    for (int i = 0; i < N; i++) {
+        for (int j = 0; j < N; j++) {
+            A[i][j] = (i + j) % 100;
+            B[i][j] = (i - j) % 100;
+            C[i][j] = 0.0;
+        }
+    }
+
+    // Main thread computes block 0, so nthreads cores are enough
+    for (long t = 1; t < nthreads; t++)
+        pthread_create(&threads[t], NULL, worker, (void *)t);
+    worker((void *)0);
+    for (long t = 1; t < nthreads; t++)
+        pthread_join(threads[t], NULL);
+
+    // Print one element to avoid optimization
+    printf("C[0][0] = %f\n", C[0][0]);
+    return 0;
+}
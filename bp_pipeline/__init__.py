@@ -0,0 +1,43 @@
+"""
+bp_pipeline
+
+In-process API for the branch-predictor study: define sweeps, launch gem5
+runs, ingest their stats and query the results as DataFrames, with the data
+kept in memory between steps.
+
+    import bp_pipeline as bp
+    sweep = bp.Sweep(bp_types=["LocalBP", "TAGE"], workloads=["Binaries/fft.1"])
+    res = bp.collect(bp.launch(sweep))
+    res.summary(by=["workload", "predictor"])
+    bp.report.accuracy_report(res)
+
+Submodules are imported on first use, so defining or launching a sweep does
+not load pandas and analysis does not load matplotlib until a plot is made.
+script.py, collect_stats_bp.py, compute_and_plot_accuracy.py,
+plot_bp_accuracy.py and shadow_bp.py are command-line wrappers around these
+functions; config.py (run by gem5) imports bp_pipeline.checkpointing and
+bp_pipeline.shadow.
+"""
+import importlib
+
+# public name -> submodule defining it
+_EXPORTS = {
+    "Sweep": "sweep",
+    "launch": "sweep",
+    "collect_rows": "stats",
+    "write_csv": "stats",
+    "Results": "results",
+    "collect": "results",
+    "load_csv": "results",
+}
+_SUBMODULES = ["analysis", "checkpointing", "host_profile", "report", "results", "shadow", "stats", "sweep"]
+
+__all__ = list(_EXPORTS) + _SUBMODULES
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module("." + _EXPORTS[name], __name__), name)
+    if name in _SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
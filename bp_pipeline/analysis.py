@@ -0,0 +1,295 @@
+"""
+bp_pipeline.analysis
+
+Shared analysis helpers for the branch-predictor pipeline, used through
+bp_pipeline.Results and by compute_and_plot_accuracy.py / plot_bp_accuracy.py.
+
+All metrics are computed with whole-column operations so that summaries of
+10k+ runs (and several stats dumps per run) stay interactive:
+
+  - load_summary(path)       read a collector / median / accuracy CSV and map
+                             its columns onto the canonical names below
+  - add_metrics(df)          accuracy, predictor-attributed accuracy, MPKI,
+                             host ns per committed branch
+  - add_ipc_delta(df, ...)   IPC delta / speedup vs. a baseline predictor
+  - summarize(df, by, ...)   median per group + bootstrap confidence intervals
+                             (groups of equal size resampled together)
+  - accuracy_table(summary)  per-workload/predictor table of accuracy_summary.csv
+
+Canonical columns: workload, config, predictor, branch_committed,
+branch_mispredicted, branch_mispredict_due_predictor, ipc, sim_insts (and
+optionally dump). config is the memory / branch-target tag of the run folder
+("default" for untagged runs), so runs of different sweep configurations are
+never pooled into one median.
+"""
+import numpy as np
+import pandas as pd
+
+# canonical name -> accepted source names (first match wins)
+COLUMN_ALIASES = {
+    "branch_committed": [
+        "branch_committed", "branch_committed_median",
+        "system.cpu.branchPred.committed_0::total",
+    ],
+    "branch_mispredicted": [
+        "branch_mispredicted", "branch_mispredicted_median",
+        "system.cpu.branchPred.mispredicted_0::total",
+    ],
+    "branch_mispredict_due_predictor": [
+        "branch_mispredict_due_predictor", "branch_mispredict_due_predictor_median",
+        "branch_mispredictDueToPredictor",
+        "system.cpu.branchPred.mispredictDueToPredictor_0::total",
+    ],
+    "ipc": ["ipc", "ipc_median", "system.cpu.ipc", "IPC_calc", "IPC"],
+    "sim_insts": ["sim_insts", "sim_insts_median", "simInsts"],
+    "accuracy_committed": ["accuracy_committed"],
+}
+
+# predictor-name suffix of passive shadow_bp.py replays
+SHADOW_SUFFIX = " (shadow)"
+
+METRICS = ["accuracy_committed", "accuracy_predictor", "mpki", "ipc"]
+DEFAULT_BY = ["workload", "config", "predictor"]
+
+
+def normalize_columns(df):
+    """Rename known source columns to canonical names and coerce them to numbers."""
+    df = df.copy()
+    rename = {}
+    for canon, aliases in COLUMN_ALIASES.items():
+        if canon in df.columns:
+            continue
+        for a in aliases:
+            if a in df.columns and a not in rename:
+                rename[a] = canon
+                break
+    df = df.rename(columns=rename)
+    for canon in COLUMN_ALIASES:
+        if canon in df.columns:
+            df[canon] = pd.to_numeric(df[canon], errors="coerce")
+    if "workload" not in df.columns:
+        df["workload"] = "ALL"
+    if "config" not in df.columns:
+        df["config"] = "default"
+    if "predictor" not in df.columns:
+        if "run" in df.columns:
+            df["predictor"] = df["run"].astype(str).str.split("_").str[1].fillna(df["run"].astype(str))
+        else:
+            df["predictor"] = "unknown"
+    df["workload"] = df["workload"].astype(str)
+    df["config"] = df["config"].fillna("default").astype(str)
+    df["predictor"] = df["predictor"].astype(str)
+    # passive replays (shadow_bp.py) are kept apart from real runs of the same predictor
+    if "shadow_of" in df.columns:
+        shadow = df["shadow_of"].notna() & (df["shadow_of"].astype(str) != "")
+        df.loc[shadow, "predictor"] = df.loc[shadow, "predictor"] + SHADOW_SUFFIX
+    return df
+
+
+def is_shadow(df):
+    """Boolean mask of the passive shadow_bp.py replay rows"""
+    return df["predictor"].astype(str).str.endswith(SHADOW_SUFFIX)
+
+
+def load_summary(path):
+    """Read a summary CSV and return it with canonical column names."""
+    return normalize_columns(pd.read_csv(path))
+
+
+def _ratio(num, den):
+    """Element-wise num/den with NaN where den is 0 or missing."""
+    den = den.where(den != 0)
+    return num / den
+
+
+def add_metrics(df):
+    """
+    Add accuracy_committed, accuracy_predictor and mpki columns, and
+    host_<component>_ns_per_branch for every host_<component>_seconds column
+    of a host profile (shadow_model_ns_per_branch for timed shadow
+    replays), all vectorized. Profile components are divided by the
+    branches of the profiled process (host_branches) when it is known.
+    """
+    df = df.copy()
+    nan = pd.Series(np.nan, index=df.index)
+    committed = df.get("branch_committed", nan)
+    mispred = df.get("branch_mispredicted", nan)
+    by_pred = df.get("branch_mispredict_due_predictor", nan)
+    insts = df.get("sim_insts", nan)
+    if "accuracy_committed" not in df.columns or df["accuracy_committed"].isna().all():
+        df["accuracy_committed"] = 1.0 - _ratio(mispred, committed)
+    df["accuracy_predictor"] = 1.0 - _ratio(by_pred, committed)
+    df["mpki"] = _ratio(mispred, insts) * 1000.0
+    host = [c for c in df.columns if c.startswith("host_") and c.endswith("_seconds")]
+    profiled = committed
+    if "host_branches" in df.columns:
+        profiled = pd.to_numeric(df["host_branches"], errors="coerce").fillna(committed)
+    for col in host + [c for c in ["shadow_model_seconds"] if c in df.columns]:
+        per_branch = col[:-len("_seconds")] + "_ns_per_branch"
+        den = committed if col in ("host_seconds", "shadow_model_seconds") else profiled
+        df[per_branch] = _ratio(pd.to_numeric(df[col], errors="coerce"), den) * 1e9
+    return df
+
+
+def add_ipc_delta(df, baseline="LocalBP", by=("workload", "config"), ipc_col="ipc"):
+    """
+    Add ipc_delta (absolute) and ipc_speedup (ratio) against the median IPC of
+    the baseline predictor in the same `by` group. Groups without a baseline
+    row get NaN.
+    """
+    df = df.copy()
+    by = list(by)
+    if ipc_col not in df.columns:
+        df["ipc_delta"] = np.nan
+        df["ipc_speedup"] = np.nan
+        return df
+    base = (df[df["predictor"] == baseline]
+            .groupby(by, sort=False)[ipc_col].median()
+            .rename("_ipc_base"))
+    df = df.join(base, on=by)
+    df["ipc_delta"] = df[ipc_col] - df["_ipc_base"]
+    df["ipc_speedup"] = _ratio(df[ipc_col], df["_ipc_base"])
+    return df.drop(columns="_ipc_base")
+
+
+def bootstrap_ci(values, n_boot=1000, ci=0.95, stat=np.median, rng=None, max_cells=2_000_000):
+    """Percentile bootstrap interval of `stat` over a 1-D sample"""
+    lo, hi = bootstrap_ci_groups([values], n_boot=n_boot, ci=ci, stat=stat, rng=rng, max_cells=max_cells)
+    return lo[0], hi[0]
+
+
+def bootstrap_ci_groups(samples, n_boot=1000, ci=0.95, stat=np.median, rng=None, max_cells=2_000_000):
+    """
+    bootstrap_ci() of many 1-D samples at once, as (lo, hi) arrays. Samples
+    of equal size (after dropping NaNs) are stacked and share one resample
+    index matrix, so the cost is a few vectorized calls per distinct size
+    instead of one Python call per group.
+    """
+    rng = np.random.default_rng(rng)
+    lo = np.full(len(samples), np.nan)
+    hi = np.full(len(samples), np.nan)
+    by_size = {}
+    for i, vals in enumerate(samples):
+        vals = np.asarray(vals, dtype=float)
+        vals = vals[~np.isnan(vals)]
+        by_size.setdefault(vals.size, []).append((i, vals))
+    alpha = (1.0 - ci) / 2.0
+    for n, members in sorted(by_size.items()):
+        pos = np.array([i for i, _ in members])
+        if n == 0:
+            continue
+        vals = np.vstack([v for _, v in members])
+        if n == 1:
+            lo[pos] = hi[pos] = vals[:, 0]
+            continue
+        if stat is np.median:
+            # with each row sorted, the sorted resample indices point straight
+            # at the middle order statistics, so only those two are gathered
+            vals.sort(axis=1)
+            chunk = max(1, min(n_boot, max_cells // max(n, len(members))))
+        else:
+            chunk = max(1, min(n_boot, max_cells // (n * len(members))))
+        out = np.empty((len(members), n_boot))
+        for start in range(0, n_boot, chunk):
+            stop = min(n_boot, start + chunk)
+            idx = rng.integers(0, n, size=(stop - start, n))
+            if stat is np.median:
+                idx.sort(axis=1)
+                out[:, start:stop] = 0.5 * (vals[:, idx[:, (n - 1) // 2]] + vals[:, idx[:, n // 2]])
+            else:
+                out[:, start:stop] = stat(vals[:, idx], axis=2)
+        lo[pos], hi[pos] = np.quantile(out, [alpha, 1.0 - alpha], axis=1)
+    return lo, hi
+
+
+def summarize(df, by=DEFAULT_BY, metrics=None, n_boot=1000, ci=0.95, seed=0):
+    """
+    Median of every numeric column per `by` group (suffix `_median`), plus
+    `<metric>_ci_lo` / `<metric>_ci_hi` bootstrap bounds for each metric.
+
+    Each row is one sample, so repetitions, sampled intervals (one row per
+    stats dump) or both can be pooled simply by choosing `by`. `by` may be
+    any sweep axis present as a column (e.g. ["workload", "l2_size"]).
+    Pass n_boot=0 to skip the intervals.
+    """
+    by = list(by)
+    if metrics is None:
+        metrics = [m for m in METRICS if m in df.columns]
+    numeric = [c for c in df.select_dtypes(include="number").columns if c not in by]
+    grouped = df.groupby(by, sort=True)
+    med = grouped[numeric].median().add_suffix("_median")
+    med["n_samples"] = grouped.size()
+    if n_boot and metrics:
+        rng = np.random.default_rng(seed)
+        indices = grouped.indices
+        keys = [key if isinstance(key, tuple) else (key,) for key in indices]
+        cis = {}
+        for m in metrics:
+            col = df[m].to_numpy(dtype=float)
+            lo, hi = bootstrap_ci_groups([col[idx] for idx in indices.values()],
+                                         n_boot=n_boot, ci=ci, rng=rng)
+            cis[m + "_ci_lo"] = lo
+            cis[m + "_ci_hi"] = hi
+        if len(by) > 1:
+            index = pd.MultiIndex.from_tuples(keys, names=by)
+        else:
+            index = pd.Index([k[0] for k in keys], name=by[0])
+        med = med.join(pd.DataFrame(cis, index=index))
+    return med.reset_index()
+
+
+# CPI stack and mispredict cost (bp_pipeline.stats add_cpi_stack)
+CPI_STACK = ["cpi_base", "cpi_frontend", "cpi_branch", "cpi_backend", "cpi_other"]
+CPI_LABELS = ["base", "frontend", "branch squash", "backend / memory", "other"]
+
+
+def accuracy_table(summary, baseline="LocalBP"):
+    """
+    The accuracy_summary.csv table from a summarize(by=["workload", "config",
+    "predictor"]) result: branch counts, accuracies, MPKI, IPC delta vs.
+    baseline, CPI stack, host cost per committed branch and the bootstrap
+    bounds.
+    """
+    acc_df = pd.DataFrame({
+        'workload': summary['workload'],
+        'predictor': summary['predictor'],
+        'branch_committed_median': summary.get('branch_committed_median', np.nan),
+        'branch_mispredicted_median': summary.get('branch_mispredicted_median', np.nan),
+        'branch_mispredict_due_predictor_median': summary.get('branch_mispredict_due_predictor_median', np.nan),
+        'ipc_median': summary.get('ipc_median', np.nan),
+        'accuracy_committed': summary['accuracy_committed_median'],
+        'accuracy_predictor': summary['accuracy_predictor_median'],
+        'mpki_est': summary['mpki_median'],
+        'ipc_delta_vs_' + baseline: summary.get('ipc_delta_median', np.nan),
+        'ipc_speedup_vs_' + baseline: summary.get('ipc_speedup_median', np.nan),
+        'n_samples': summary['n_samples'],
+    })
+    if 'config' in summary.columns:
+        acc_df.insert(1, 'config', summary['config'])
+    for c in ['cpi_total'] + CPI_STACK + ['cycles_per_mispredict', 'squashed_insts_per_mispredict', 'memory_stall_share',
+              'host_ns_per_branch', 'host_branchPred_ns_per_branch']:
+        if c + '_median' in summary.columns:
+            acc_df[c] = summary[c + '_median']
+    for c in summary.columns:
+        if c.endswith('_ci_lo') or c.endswith('_ci_hi'):
+            acc_df[c] = summary[c]
+    return acc_df
+
+
+def host_cost_table(summary):
+    """
+    Host time per committed branch (ns) by simulator component from a
+    summarize() result, one row per group, most expensive predictor first.
+    bp_share is the branch predictor's share of the profiled host time.
+    Shadow replays are left out: their Python model time is not gem5 cost.
+    """
+    if "predictor" in summary.columns:
+        summary = summary[~is_shadow(summary)]
+    cols = [c for c in summary.columns if c.startswith("host_") and c.endswith("_ns_per_branch_median")]
+    keys = [c for c in summary.columns if not c.endswith(("_median", "_ci_lo", "_ci_hi")) and c != "n_samples"]
+    out = summary[keys + cols].rename(columns={c: c[:-len("_median")] for c in cols})
+    parts = [c[:-len("_median")] for c in cols if c != "host_ns_per_branch_median"]
+    if "host_branchPred_ns_per_branch" in out.columns and parts:
+        out["bp_share"] = _ratio(out["host_branchPred_ns_per_branch"], out[parts].sum(axis=1, min_count=1))
+    sort = "host_branchPred_ns_per_branch"
+    return out.sort_values(sort, ascending=False) if sort in out.columns else out
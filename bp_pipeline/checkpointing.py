@@ -0,0 +1,283 @@
+"""
+bp_pipeline.checkpointing
+
+Helpers for periodic checkpoints of long runs (config.py --checkpoint_interval)
+and for resuming killed runs from the newest one (bp_pipeline.launch).
+
+Layout inside a run directory (the gem5 -d outdir, e.g. Stats_BP/<run>/):
+  cpt.<insts>/            checkpoint taken after <insts> committed instructions
+  segment                 start instruction count of the current gem5 process
+  stats.seg<start>.txt    stats.txt of each finished or killed process
+  stats.txt               merged whole-run stats (written by merge_segments)
+
+While checkpointing, config.py dumps and resets stats at every checkpoint, so
+each segment file holds one dump per interval plus a final partial dump.
+"""
+import math
+import os
+import re
+import shutil
+import subprocess
+
+CPT_RE = re.compile(r"^cpt\.(\d+)$")
+SEG_RE = re.compile(r"^stats\.seg(\d+)\.txt$")
+DUMP_BEGIN = "---------- Begin Simulation Statistics ----------"
+DUMP_END = "---------- End Simulation Statistics   ----------"
+# name  value  [pct  cum]  # description (Unit)
+STAT_RE = re.compile(r"^(\S+)\s+([-+0-9.eE]+|nan|inf)\b[^#]*(#\s*(.*?))?\s*$")
+UNIT_RE = re.compile(r"\(([^()]*)\)\s*$")
+
+# units that add up across intervals; everything else is averaged
+ADDITIVE_UNITS = {"Count", "Tick", "Cycle", "Second", "Byte", "Joule"}
+# running totals and gauges rather than per-interval counts
+LAST_VALUE = {"finalTick", "hostMemory", "simFreq"}
+# distribution summary fields; the other fields of a distribution (samples,
+# buckets, total, overflows) are counts and add up
+DIST_SUMMARY = {"mean", "stdev", "gmean", "min_value", "max_value"}
+# ratios rebuilt from the merged counts: pattern -> (numerators, denominators,
+# scale), with {0}, {1}.. standing for the pattern's groups
+RATIOS = [
+    (re.compile(r"^(.*)\.(\w+)MissRate::(\w+)$"), (["{0}.{1}Misses::{2}"], ["{0}.{1}Accesses::{2}"], 1.0)),
+    (re.compile(r"^(.*)\.pageHitRate$"), (["{0}.readRowHits", "{0}.writeRowHits"],
+                                          ["{0}.readBursts", "{0}.writeBursts"], 100.0)),
+    (re.compile(r"^(.*)\.avgMemAccLat$"), (["{0}.totMemAccLat"], ["{0}.readBursts"], 1.0)),
+    (re.compile(r"^(.*)\.avgQLat$"), (["{0}.totQLat"], ["{0}.readBursts"], 1.0)),
+    (re.compile(r"^(.*)\.BTBHitRatio$"), (["{0}.BTBHits"], ["{0}.BTBLookups"], 1.0)),
+    (re.compile(r"^(.*)\.ipc$"), (["{0}.commitStats0.numInsts"], ["{0}.numCycles"], 1.0)),
+    (re.compile(r"^(.*)\.cpi$"), (["{0}.numCycles"], ["{0}.commitStats0.numInsts"], 1.0)),
+]
+
+
+def checkpoint_name(insts):
+    return "cpt.%d" % insts
+
+
+def checkpoint_insts(path):
+    """Committed-instruction count encoded in a checkpoint directory name"""
+    m = CPT_RE.match(os.path.basename(os.path.normpath(path)))
+    return int(m.group(1)) if m else 0
+
+
+def list_checkpoints(run_dir):
+    """Complete checkpoints in run_dir, oldest first"""
+    if not os.path.isdir(run_dir):
+        return []
+    cpts = [d for d in os.listdir(run_dir)
+            if CPT_RE.match(d) and os.path.isdir(os.path.join(run_dir, d))]
+    return [os.path.join(run_dir, d) for d in sorted(cpts, key=checkpoint_insts)]
+
+
+def newest_checkpoint(run_dir):
+    cpts = list_checkpoints(run_dir)
+    return cpts[-1] if cpts else None
+
+
+def rotate_checkpoints(run_dir, keep):
+    """Delete all but the newest `keep` checkpoints"""
+    if keep <= 0:
+        return
+    for path in list_checkpoints(run_dir)[:-keep]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# -----------------------------
+# Stats segments
+# -----------------------------
+def archive_segment(run_dir):
+    """Move stats.txt of the last gem5 process to stats.seg<start>.txt"""
+    stats = os.path.join(run_dir, "stats.txt")
+    seg = os.path.join(run_dir, "segment")
+    if not (os.path.exists(stats) and os.path.exists(seg)):
+        return
+    with open(seg) as fh:
+        start = int(fh.read().strip() or 0)
+    os.replace(stats, os.path.join(run_dir, "stats.seg%d.txt" % start))
+    os.remove(seg)
+
+
+def begin_segment(run_dir, start):
+    with open(os.path.join(run_dir, "segment"), "w") as fh:
+        fh.write("%d\n" % start)
+
+
+def read_dumps(path):
+    """Complete dumps of a stats file as lists of (name, value, description)"""
+    dumps, cur = [], None
+    with open(path) as fh:
+        for ln in fh:
+            ln = ln.rstrip("\n")
+            if ln.startswith(DUMP_BEGIN):
+                cur = []
+            elif ln.startswith(DUMP_END):
+                if cur is not None:
+                    dumps.append(cur)
+                cur = None
+            elif cur is not None:
+                m = STAT_RE.match(ln)
+                if m:
+                    cur.append((m.group(1), float(m.group(2)), m.group(4) or ""))
+    return dumps
+
+
+def _merge_dist(name, field, dumps_vals):
+    """
+    Merge one distribution summary field over intervals. dumps_vals is a
+    list of ({field: value}, samples) per interval for the distribution.
+    """
+    vals = [(d[field], n) for d, n in dumps_vals if field in d and d[field] == d[field]]
+    if not vals:
+        return float("nan")
+    if field == "min_value":
+        return min(v for v, n in vals if n) if any(n for _, n in vals) else vals[-1][0]
+    if field == "max_value":
+        return max(v for v, n in vals if n) if any(n for _, n in vals) else vals[-1][0]
+    total = sum(n for _, n in vals)
+    if not total:
+        return vals[-1][0]
+    if field == "mean":
+        return sum(v * n for v, n in vals) / total
+    if field == "gmean":
+        if any(v <= 0 for v, n in vals if n):
+            return float("nan")
+        return math.exp(sum(math.log(v) * n for v, n in vals if n) / total)
+    # stdev: pooled over intervals from each interval's mean and stdev
+    means = [(d.get("mean", float("nan")), n) for d, n in dumps_vals if "stdev" in d and d["stdev"] == d["stdev"]]
+    mean = sum(m * n for m, n in means) / total
+    sq = sum(n * (sd * sd + m * m) for (sd, n), (m, _) in zip(vals, means))
+    return math.sqrt(max(sq / total - mean * mean, 0.0))
+
+
+def merge_dumps(dumps):
+    """
+    Combine interval dumps into whole-run values:
+      - counts (additive units, distribution buckets/samples) are summed
+      - distribution mean/stdev/gmean are pooled over the samples, min/max
+        taken over the intervals
+      - gauges and running totals (LAST_VALUE) keep the last value
+      - ratios in RATIOS are rebuilt from the merged counts
+      - other stats (rates, averages) are weighted by each interval's simTicks
+    """
+    order, desc, sums, wsum, weights, last = [], {}, {}, {}, {}, {}
+    dists = {}  # distribution name -> list of ({summary field: value}, samples)
+    for dump in dumps:
+        vals = {n: v for n, v, _ in dump}
+        ticks = vals.get("simTicks", 1.0) or 1.0
+        seen = {}
+        for name, val, d in dump:
+            if name not in desc:
+                order.append(name)
+                desc[name] = d
+            last[name] = val
+            base, _, field = name.rpartition("::")
+            is_dist = base and base + "::samples" in vals
+            if is_dist and field in DIST_SUMMARY:
+                seen.setdefault(base, {})[field] = val
+                continue
+            unit = UNIT_RE.search(d)
+            if is_dist or (unit and unit.group(1) in ADDITIVE_UNITS):
+                sums[name] = sums.get(name, 0.0) + val
+            elif val == val:  # skip nan
+                wsum[name] = wsum.get(name, 0.0) + val * ticks
+                weights[name] = weights.get(name, 0.0) + ticks
+        for base, fields in seen.items():
+            dists.setdefault(base, []).append((fields, vals.get(base + "::samples", 0.0)))
+
+    merged = {}
+    for name in order:
+        base, _, field = name.rpartition("::")
+        if name in LAST_VALUE:
+            val = last[name]
+        elif base in dists and field in DIST_SUMMARY:
+            val = _merge_dist(base, field, dists[base])
+        elif name in sums:
+            val = sums[name]
+        elif weights.get(name):
+            val = wsum[name] / weights[name]
+        else:
+            val = float("nan")
+        merged[name] = val
+    for name in order:
+        for pat, (nums, dens, scale) in RATIOS:
+            m = pat.match(name)
+            if not m:
+                continue
+            num = [merged.get(t.format(*m.groups())) for t in nums]
+            den = [merged.get(t.format(*m.groups())) for t in dens]
+            if None not in num and None not in den and sum(den):
+                merged[name] = scale * sum(num) / sum(den)
+            break
+    return [(name, merged[name], desc[name]) for name in order]
+
+
+def _fmt(val):
+    if val != val or val in (float("inf"), float("-inf")):
+        return str(val)
+    return "%d" % val if val == int(val) else "%.6f" % val
+
+
+def merge_segments(run_dir, interval):
+    """
+    Write stats.txt for the whole run from the stats.seg*.txt files. Only the
+    intervals up to the checkpoint the next segment resumed from are kept from
+    each segment; the last segment contributes everything.
+    """
+    segs = sorted((int(m.group(1)), os.path.join(run_dir, f))
+                  for f in os.listdir(run_dir) for m in [SEG_RE.match(f)] if m)
+    dumps = []
+    for i, (start, path) in enumerate(segs):
+        seg_dumps = read_dumps(path)
+        if i + 1 < len(segs):
+            n = (segs[i + 1][0] - start) // interval
+            seg_dumps = seg_dumps[:n]
+        dumps += seg_dumps
+    if not dumps:
+        return False
+    with open(os.path.join(run_dir, "stats.txt"), "w") as fh:
+        fh.write("\n%s\n\n" % DUMP_BEGIN)
+        for name, val, d in merge_dumps(dumps):
+            fh.write("%-50s %20s  # %s\n" % (name, _fmt(val), d))
+        fh.write("\n%s\n\n" % DUMP_END)
+    return True
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def run_with_resume(cmd, run_dir, interval, max_restarts=10):
+    """
+    Run a gem5 command (list, config args last) and restart it from the newest
+    checkpoint in run_dir whenever it dies, then merge the stats segments.
+    A run whose 'complete' marker exists is skipped. Retries stop when an
+    attempt fails without writing a new checkpoint (bad arguments, missing
+    binary, a crash before the first interval), since the next one would
+    fail the same way.
+    """
+    done_marker = os.path.join(run_dir, "complete")
+    if os.path.exists(done_marker):
+        print("Already complete:", run_dir)
+        return 0
+    # stats left behind by a killed previous invocation
+    archive_segment(run_dir)
+
+    ret = 1
+    for attempt in range(max_restarts + 1):
+        cpt = newest_checkpoint(run_dir)
+        run_cmd = list(cmd)
+        if cpt:
+            run_cmd.append(f"--restore_from={cpt}")
+            print(f"Resuming from {cpt}")
+        begin_segment(run_dir, checkpoint_insts(cpt) if cpt else 0)
+        print("Running:", " ".join(run_cmd))
+        ret = subprocess.call(run_cmd)
+        archive_segment(run_dir)
+        if ret == 0:
+            break
+        print(f"gem5 exited with {ret} (attempt {attempt + 1})")
+        if newest_checkpoint(run_dir) == cpt:
+            print("No new checkpoint since the last attempt; not retrying", run_dir)
+            break
+
+    merge_segments(run_dir, interval)
+    if ret == 0:
+        open(done_marker, "w").close()
+    return ret
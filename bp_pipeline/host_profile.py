@@ -0,0 +1,197 @@
+"""
+bp_pipeline.host_profile
+
+Sampling host profile of the gem5 process, attributed to simulator
+components. With Sweep(host_profile=True) (script.py host_profile = True)
+every gem5 command runs under `perf record --call-graph dwarf` (frame
+pointers are omitted in gem5.opt, so -g would lose most callers), copying
+DWARF_STACK bytes of stack per sample: perf's 8 KB default makes several GB
+of perf.data per long run, and since the innermost matching frame wins the
+outer frames a smaller dump cuts off are rarely needed.
+Afterwards each call-graph sample is charged to the innermost frame that belongs to a known component,
+so a std::vector access inside TAGE counts as branchPred and a TAGE lookup
+made by fetch counts as branchPred, not fetch:
+
+  branchPred   gem5::branch_prediction (direction predictor, BTB, RAS, indirect)
+  fetch, decode, rename, iew, commit
+               the O3 stage classes and the structures they own (IQ, LSQ, ROB)
+  o3_other     the rest of gem5::o3 (CPU tick, dynamic instructions)
+  caches       caches, tags, replacement policies, prefetchers, MSHRs
+  memory       memory controllers, DRAM interfaces, crossbars
+  isa          the x86 decoder and instruction implementations
+  eventq       event queue and simulation loop
+  other        everything else (Python, libc, kernel)
+
+The breakdown is written to <run_dir>/host_profile.txt in gem5 text-stats
+format: host.samples::<component>, host.share::<component>,
+host.seconds::<component> (share times the hostSeconds of the profiled gem5
+process) and host.branches (committed branches of that process). The
+collector reads these as host_<component>_seconds and host_branches columns.
+
+Needs Linux perf with access to the process (kernel.perf_event_paranoid <= 2)
+and a gem5 binary with symbols (gem5.opt keeps them). With checkpoint
+resume every process overwrites perf.data, so only the last segment is
+profiled; its seconds and branches come from the newest stats.seg<start>.txt
+rather than the merged stats.txt.
+
+Usage (re-attribute existing perf.data files):
+  python3 -m bp_pipeline.host_profile Stats_BP/O3CPU_TAGE_mm --keep_data
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+from collections import Counter
+
+from .checkpointing import SEG_RE
+
+PERF_DATA = "perf.data"
+PROFILE_FILE = "host_profile.txt"
+DEFAULT_FREQ = 499  # Hz; odd so it does not alias with periodic host work
+DWARF_STACK = 2048  # bytes of user stack copied per sample (multiple of 8)
+
+# component -> demangled-symbol pattern; a frame gets the first match
+COMPONENTS = [
+    ("branchPred", r"gem5::branch_prediction::"),
+    ("fetch", r"gem5::o3::Fetch::"),
+    ("decode", r"gem5::o3::Decode::"),
+    ("rename", r"gem5::o3::(Rename|UnifiedRenameMap|SimpleRenameMap|UnifiedFreeList|SimpleFreeList)\b"),
+    ("iew", r"gem5::o3::(IEW|InstructionQueue|LSQ|LSQUnit|MemDepUnit|StoreSet|FUPool)\b"),
+    ("commit", r"gem5::o3::(Commit|ROB)\b"),
+    ("o3_other", r"gem5::o3::"),
+    ("caches", r"gem5::(BaseCache|Cache|NoncoherentCache|BaseTags|BaseSetAssoc|MSHR|MSHRQueue|WriteQueue"
+               r"|CacheBlk|prefetch::|replacement_policy::|compression::)"),
+    ("memory", r"gem5::(memory::|BaseXBar|CoherentXBar|NoncoherentXBar|SnoopFilter)"),
+    ("isa", r"gem5::X86ISA::"),
+    ("eventq", r"gem5::(EventQueue|simulate|doSimLoop|EventManager)\b"),
+]
+COMPONENTS = [(name, re.compile(pat)) for name, pat in COMPONENTS]
+COMPONENT_NAMES = [name for name, _ in COMPONENTS] + ["other"]
+
+# "    7f3a2b1c4d5e gem5::o3::Fetch::tick()+0x1a (/path/gem5.opt)"
+FRAME_RE = re.compile(r"^\s+[0-9a-fA-F]+\s+(.*?)(\+0x[0-9a-fA-F]+)?(\s+\(.*\))?$")
+HOST_SECONDS_RE = re.compile(r"^hostSeconds\s+([-+0-9.eE]+)")
+BRANCHES_RE = re.compile(r"^system\.cpu\d*\.branchPred\.committed_0::total\s+([-+0-9.eE]+)")
+
+
+def check_perf():
+    """Raise FileNotFoundError unless Linux perf is on PATH"""
+    if shutil.which("perf") is None:
+        raise FileNotFoundError("host_profile needs Linux perf on PATH (e.g. the linux-tools package)")
+
+
+def profile_cmd(cmd, run_dir, freq=DEFAULT_FREQ, stack=DWARF_STACK):
+    """cmd (a gem5 command list) wrapped in perf record writing run_dir/perf.data"""
+    return ["perf", "record", "-F", str(freq), "--call-graph", "dwarf,%d" % stack, "--quiet",
+            "-o", os.path.join(run_dir, PERF_DATA), "--"] + list(cmd)
+
+
+def classify(symbol):
+    for name, pat in COMPONENTS:
+        if pat.search(symbol):
+            return name
+    return None
+
+
+def read_stacks(perf_data):
+    """Yield each sample's call stack (leaf first) as a list of symbols"""
+    proc = subprocess.Popen(["perf", "script", "-i", perf_data, "-F", "ip,sym", "--no-inline"],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                            errors="replace")
+    stack = []
+    for ln in proc.stdout:
+        if not ln.strip():
+            if stack:
+                yield stack
+            stack = []
+            continue
+        m = FRAME_RE.match(ln.rstrip("\n"))
+        if m:
+            stack.append(m.group(1))
+    if stack:
+        yield stack
+    proc.wait()
+
+
+def attribute(stacks):
+    """Sample counts per component (innermost matching frame wins)"""
+    counts = Counter({name: 0 for name in COMPONENT_NAMES})
+    for stack in stacks:
+        comp = next((c for c in map(classify, stack) if c), "other")
+        counts[comp] += 1
+    return counts
+
+
+def profiled_stats(run_dir):
+    """
+    Stats file of the gem5 process that wrote perf.data: the newest
+    stats.seg<start>.txt of a checkpoint-resumed run, else stats.txt
+    """
+    segs = [(int(m.group(1)), f) for f in os.listdir(run_dir) for m in [SEG_RE.match(f)] if m]
+    return os.path.join(run_dir, max(segs)[1] if segs else "stats.txt")
+
+
+def host_totals(run_dir):
+    """
+    (hostSeconds, committed branches) of the profiled process, or None for
+    a missing value. Dumps are summed: config.py resets stats after each.
+    """
+    seconds = branches = None
+    path = profiled_stats(run_dir)
+    if os.path.exists(path):
+        with open(path) as fh:
+            for ln in fh:
+                m = HOST_SECONDS_RE.match(ln)
+                if m:
+                    seconds = (seconds or 0.0) + float(m.group(1))
+                m = BRANCHES_RE.match(ln)
+                if m:
+                    branches = (branches or 0.0) + float(m.group(1))
+    return seconds, branches
+
+
+def write_profile(path, counts, seconds=None, branches=None):
+    """gem5 text-stats style file so bp_pipeline.stats can parse it"""
+    total = sum(counts.values())
+    with open(path, "w") as fh:
+        fh.write("\n---------- Begin Simulation Statistics ----------\n")
+        fh.write("%-50s %14d  # %s\n" % ("host.samples::total", total, "Host profile samples (Count)"))
+        if branches is not None:
+            fh.write("%-50s %14d  # %s\n" % ("host.branches", branches,
+                                             "Committed branches of the profiled process (Count)"))
+        for name in COMPONENT_NAMES:
+            n = counts.get(name, 0)
+            share = n / total if total else 0.0
+            fh.write("%-50s %14d  # %s\n" % ("host.samples::" + name, n,
+                                             "Host profile samples in %s (Count)" % name))
+            fh.write("%-50s %14.6f  # %s\n" % ("host.share::" + name, share,
+                                               "Share of host samples in %s (Ratio)" % name))
+            if seconds is not None:
+                fh.write("%-50s %14.6f  # %s\n" % ("host.seconds::" + name, share * seconds,
+                                                   "Host time attributed to %s (Second)" % name))
+        fh.write("\n---------- End Simulation Statistics   ----------\n")
+
+
+def profile_run(run_dir, keep_data=False):
+    """Attribute run_dir/perf.data and write host_profile.txt next to stats.txt"""
+    perf_data = os.path.join(run_dir, PERF_DATA)
+    if not os.path.exists(perf_data):
+        print("No perf data in", run_dir)
+        return None
+    counts = attribute(read_stacks(perf_data))
+    out = os.path.join(run_dir, PROFILE_FILE)
+    write_profile(out, counts, *host_totals(run_dir))
+    if not keep_data:
+        os.remove(perf_data)
+    print("Wrote", out)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("run_dir", nargs="+", help="Run directories (gem5 -d outdir) with a perf.data")
+    parser.add_argument("--keep_data", action="store_true", help="Keep perf.data after attribution")
+    args = parser.parse_args()
+    for d in args.run_dir:
+        profile_run(d, keep_data=args.keep_data)
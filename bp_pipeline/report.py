@@ -0,0 +1,311 @@
+"""
+bp_pipeline.report
+
+Plots and report files built from Results (matplotlib is only imported when
+this module is):
+
+  - accuracy_report(res, outdir)  accuracy_summary.csv, per-workload bar /
+                                  breakdown / CPI-stack / host-cost plots,
+                                  host_cost.csv and accuracy_section.md
+                                  (compute_and_plot_accuracy.py)
+  - accuracy_lines(res, outdir)   accuracy line plots, overall and per
+                                  workload (plot_bp_accuracy.py)
+
+Shadow replays (shadow_bp.py) never share a file with the gem5 runs: they
+get accuracy_summary_shadow.csv and *_shadow_* plots of their own.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from .analysis import CPI_STACK, CPI_LABELS, host_cost_table, is_shadow
+
+
+def panels(df):
+    """
+    (name, rows) per workload and sweep configuration; name is the workload,
+    or workload_config for tagged configurations (fft.1_ddr4+ras4)
+    """
+    keys = ['workload', 'config'] if 'config' in df.columns else ['workload']
+    out = []
+    for key, sub in df.groupby(keys, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        name = key[0] if len(key) == 1 or key[1] == 'default' else f"{key[0]}_{key[1]}"
+        out.append((str(name).replace('/', '_'), sub))
+    return out
+
+
+def accuracy_plots(acc_df, plots, shadow=False):
+    """
+    Per-workload/config accuracy, mispredict-breakdown and CPI-stack bar
+    charts; shadow=True for the shadow-replay table (hatched bars, files
+    <workload>_shadow_*.png)
+    """
+    os.makedirs(plots, exist_ok=True)
+    kind = "_shadow" if shadow else ""
+    title_suffix = " (shadow replay)" if shadow else ""
+    hatch = '//' if shadow else None
+    workloads = []
+    for wl, sub in panels(acc_df):
+        sub = sub.sort_values('accuracy_committed', ascending=False)
+        workloads.append(wl)
+        preds = sub['predictor'].tolist()
+        x = range(len(preds))
+
+        # accuracy_committed bar
+        fig, ax = plt.subplots(figsize=(8,4.5))
+        y = sub['accuracy_committed'].values
+        yerr = None
+        if 'accuracy_committed_ci_lo' in sub.columns:
+            yerr = np.vstack([y - sub['accuracy_committed_ci_lo'].values,
+                              sub['accuracy_committed_ci_hi'].values - y])
+            yerr = np.nan_to_num(np.maximum(yerr, 0))
+        ax.bar(x, y, yerr=yerr, capsize=3, hatch=hatch)
+        ax.set_xticks(x); ax.set_xticklabels(preds, rotation=30, ha='right')
+        ax.set_ylim(0,1.0)
+        ax.set_ylabel("Committed-branch accuracy")
+        ax.set_title(f"{wl}: committed-branch accuracy{title_suffix} (median)")
+        ax.grid(axis='y', linestyle='--', alpha=0.4)
+        fname = os.path.join(plots, f"{wl}{kind}_accuracy_bar.png")
+        fig.savefig(fname, bbox_inches='tight', dpi=200)
+        plt.close(fig)
+        print("Saved", fname)
+
+        # predictor-attributed accuracy bar
+        if not sub['accuracy_predictor'].isna().all():
+            fig, ax = plt.subplots(figsize=(8,4.5))
+            y2 = sub['accuracy_predictor'].fillna(0).values
+            ax.bar(x, y2, hatch=hatch)
+            ax.set_xticks(x); ax.set_xticklabels(preds, rotation=30, ha='right')
+            ax.set_ylim(0,1.0)
+            ax.set_ylabel("Predictor-attributed accuracy (1 - mispred_by_predictor/committed)")
+            ax.set_title(f"{wl}: predictor-attributed accuracy{title_suffix} (median)")
+            ax.grid(axis='y', linestyle='--', alpha=0.4)
+            fname2 = os.path.join(plots, f"{wl}{kind}_predictor_accuracy_bar.png")
+            fig.savefig(fname2, bbox_inches='tight', dpi=200)
+            plt.close(fig)
+            print("Saved", fname2)
+
+        # stacked breakdown of mispred_by_predictor vs others (median)
+        if 'branch_mispredict_due_predictor_median' in sub.columns and not sub['branch_mispredict_due_predictor_median'].isna().all():
+            pred_m = sub['branch_mispredict_due_predictor_median'].fillna(0).values
+            total_m = sub['branch_mispredicted_median'].fillna(0).values
+            other = np.maximum(total_m - pred_m, 0)
+            fig, ax = plt.subplots(figsize=(8,4.5))
+            ax.bar(x, pred_m, label='predictor-caused (median)', hatch=hatch)
+            ax.bar(x, other, bottom=pred_m, label='other-causes (median)', hatch=hatch)
+            ax.set_xticks(x); ax.set_xticklabels(preds, rotation=30, ha='right')
+            ax.set_ylabel("Number of mispredicted branches (median)")
+            ax.set_title(f"{wl}: mispredict breakdown{title_suffix} (median)")
+            ax.legend()
+            ax.grid(axis='y', linestyle='--', alpha=0.4)
+            fname3 = os.path.join(plots, f"{wl}{kind}_mispred_breakdown_median.png")
+            fig.savefig(fname3, bbox_inches='tight', dpi=200)
+            plt.close(fig)
+            print("Saved", fname3)
+
+        # CPI stack: where the cycles go for each predictor
+        if all(c in sub.columns for c in CPI_STACK) and not sub[CPI_STACK].isna().all().all():
+            fig, ax = plt.subplots(figsize=(8,4.5))
+            bottom = np.zeros(len(sub))
+            for col, label in zip(CPI_STACK, CPI_LABELS):
+                vals = sub[col].fillna(0).clip(lower=0).values
+                ax.bar(x, vals, bottom=bottom, label=label)
+                bottom += vals
+            for xi, (top, cost) in enumerate(zip(bottom, sub['cycles_per_mispredict'].values)):
+                if not pd.isna(cost):
+                    ax.annotate(f"{cost:.1f} cyc/misp", (xi, top), textcoords="offset points",
+                                xytext=(0,4), ha='center', fontsize=8)
+            ax.set_xticks(x); ax.set_xticklabels(preds, rotation=30, ha='right')
+            ax.set_ylabel("CPI (cycles per committed instruction)")
+            ax.set_title(f"{wl}: CPI stack{title_suffix} (median)")
+            ax.legend(fontsize=8)
+            ax.grid(axis='y', linestyle='--', alpha=0.4)
+            fname4 = os.path.join(plots, f"{wl}{kind}_cpi_stack.png")
+            fig.savefig(fname4, bbox_inches='tight', dpi=200)
+            plt.close(fig)
+            print("Saved", fname4)
+    return workloads
+
+
+def host_cost_plots(host_df, plots):
+    """Per-workload/config stacked bars of host ns per committed branch by simulator component"""
+    parts = [c for c in host_df.columns if c.endswith("_ns_per_branch") and c != "host_ns_per_branch"]
+    for wl, sub in panels(host_df):
+        if sub[parts].isna().all().all():
+            continue
+        preds = sub['predictor'].tolist()
+        x = range(len(preds))
+        fig, ax = plt.subplots(figsize=(8,4.5))
+        bottom = np.zeros(len(sub))
+        for col in parts:
+            vals = sub[col].fillna(0).clip(lower=0).values
+            if not vals.any():
+                continue
+            label = col[len("host_"):-len("_ns_per_branch")]
+            ax.bar(x, vals, bottom=bottom, label=label, hatch='//' if label == 'branchPred' else None)
+            bottom += vals
+        ax.set_xticks(x); ax.set_xticklabels(preds, rotation=30, ha='right')
+        ax.set_ylabel("Host ns per committed branch")
+        ax.set_title(f"{wl}: simulator host cost by component (median)")
+        ax.legend(fontsize=8)
+        ax.grid(axis='y', linestyle='--', alpha=0.4)
+        fname = os.path.join(plots, f"{wl}_host_cost.png")
+        fig.savefig(fname, bbox_inches='tight', dpi=200)
+        plt.close(fig)
+        print("Saved", fname)
+
+
+def accuracy_markdown(workloads, outdir):
+    """Markdown fragment linking the plots of accuracy_plots()"""
+    md_lines = []
+    md_lines.append("# Accuracy summary and plots")
+    for wl in workloads:
+        md_lines.append(f"## Workload: `{wl}`")
+        md_lines.append(f"![Accuracy]({os.path.join('plots', f'{wl}_accuracy_bar.png')})")
+        pred_img = os.path.join('plots', f'{wl}_predictor_accuracy_bar.png')
+        bd_img = os.path.join('plots', f'{wl}_mispred_breakdown_median.png')
+        if os.path.exists(os.path.join(outdir,pred_img)):
+            md_lines.append(f"![Predictor accuracy]({pred_img})")
+        if os.path.exists(os.path.join(outdir,bd_img)):
+            md_lines.append(f"![Breakdown]({bd_img})")
+        cpi_img = os.path.join('plots', f'{wl}_cpi_stack.png')
+        if os.path.exists(os.path.join(outdir,cpi_img)):
+            md_lines.append(f"![CPI stack]({cpi_img})")
+        host_img = os.path.join('plots', f'{wl}_host_cost.png')
+        if os.path.exists(os.path.join(outdir,host_img)):
+            md_lines.append(f"![Host cost]({host_img})")
+        shadow_img = os.path.join('plots', f'{wl}_shadow_accuracy_bar.png')
+        if os.path.exists(os.path.join(outdir,shadow_img)):
+            md_lines.append(f"![Shadow replay accuracy]({shadow_img})")
+        md_lines.append("")
+
+    md_path = os.path.join(outdir, "accuracy_section.md")
+    with open(md_path, "w") as fh:
+        fh.write("\n".join(md_lines))
+    return md_path
+
+
+def accuracy_report(res, outdir="branch_analysis", baseline="LocalBP", by=None, n_boot=1000, ci=0.95):
+    """
+    Write accuracy_summary.csv (and accuracy_summary_by_<axes>.csv when `by`
+    lists extra sweep axes), the per-workload plots and accuracy_section.md.
+    Shadow replays go to accuracy_summary_shadow.csv and their own plots.
+    Returns the accuracy table of the gem5 runs.
+    """
+    plots = os.path.join(outdir, "plots")
+    os.makedirs(plots, exist_ok=True)
+
+    # medians (and CIs) per workload/config/predictor; one row per run or per dump
+    acc_df = res.accuracy(baseline=baseline, n_boot=n_boot, ci=ci)
+    shadow = is_shadow(acc_df)
+    shadow_df, acc_df = acc_df[shadow], acc_df[~shadow]
+    acc_csv = os.path.join(outdir, "accuracy_summary.csv")
+    acc_df.to_csv(acc_csv, index=False)
+    print("Saved accuracy CSV:", acc_csv)
+    if not shadow_df.empty:
+        shadow_csv = os.path.join(outdir, "accuracy_summary_shadow.csv")
+        shadow_df.to_csv(shadow_csv, index=False)
+        print("Saved shadow accuracy CSV:", shadow_csv)
+
+    if by:
+        by_df = res.summary(by=by, n_boot=n_boot, ci=ci, baseline=baseline)
+        by_csv = os.path.join(outdir, "accuracy_summary_by_%s.csv" % "_".join(by))
+        by_df.to_csv(by_csv, index=False)
+        print("Saved grouped CSV:", by_csv)
+
+    workloads = accuracy_plots(acc_df, plots)
+    if not shadow_df.empty:
+        workloads = sorted(set(workloads) | set(accuracy_plots(shadow_df, plots, shadow=True)))
+
+    # predictors by simulator host cost (runs profiled with host_profile)
+    host_df = host_cost_table(res.summary(n_boot=0, baseline=baseline))
+    if "host_branchPred_ns_per_branch" in host_df.columns and host_df["host_branchPred_ns_per_branch"].notna().any():
+        host_csv = os.path.join(outdir, "host_cost.csv")
+        host_df.to_csv(host_csv, index=False)
+        print("Saved host cost CSV:", host_csv)
+        host_cost_plots(host_df, plots)
+    md_path = accuracy_markdown(workloads, outdir)
+    print("Wrote markdown fragment:", md_path)
+    return acc_df
+
+
+def plot_series(labels, values, title, outpath, ylim_min=None, ylim_max=1.0):
+    """Line/marker plot of accuracies with percentage annotations"""
+    fig, ax = plt.subplots(figsize=(8,4.5))
+    x = np.arange(len(labels))
+    ax.plot(x, values, marker='o', linewidth=1.8)
+    ax.set_xticks(x)
+    ax.set_xticklabels(labels, rotation=30, ha='right')
+    ax.set_title(title)
+    ax.set_ylabel("Prediction Accuracy (in %)")
+    # convert to percentage for annotation and y-axis
+    values_pct = np.array(values) * 100.0
+    # annotate
+    for xi, yi, yp in zip(x, values, values_pct):
+        txt = f"{yp:.2f}"
+        ax.annotate(txt, (xi, yi), textcoords="offset points", xytext=(0,8), ha='center', color='red', fontsize=9)
+    # y limits
+    if ylim_min is None:
+        ymin = min(values) - 0.05
+    else:
+        ymin = ylim_min
+    ymax = ylim_max
+    ax.set_ylim(ymin, ymax)
+    ax.grid(axis='y', linestyle='--', alpha=0.4)
+    fig.tight_layout()
+    fig.savefig(outpath, dpi=200)
+    plt.close(fig)
+    print("Saved", outpath)
+
+
+def accuracy_lines(res, outdir="branch_analysis/plots"):
+    """
+    bp_accuracy_overall.png plus one bp_accuracy_<workload>.png per
+    workload/config, and the same with a _shadow suffix for shadow replays
+    """
+    acc_df = res.df[['workload','config','predictor','accuracy_committed']].copy()
+    if acc_df['accuracy_committed'].isna().all():
+        raise ValueError("no branch_committed / branch_mispredicted data in %s" % (res.source or "results"))
+    os.makedirs(outdir, exist_ok=True)
+    shadow = is_shadow(acc_df)
+    if not shadow.all():
+        accuracy_line_plots(acc_df[~shadow], outdir)
+    if shadow.any():
+        accuracy_line_plots(acc_df[shadow], outdir, kind="_shadow")
+
+
+def accuracy_line_plots(acc_df, outdir, kind=""):
+    """Overall and per-workload/config median accuracy lines of acc_df"""
+    title_suffix = " (shadow replay)" if kind else ""
+
+    # 1) Global aggregation (median accuracy per predictor across workloads)
+    global_grp = acc_df.groupby('predictor')['accuracy_committed'].median().reset_index()
+    global_grp = global_grp.sort_values('accuracy_committed', ascending=True)  # ascending or descending depending on preference
+    labels = global_grp['predictor'].tolist()
+    values = global_grp['accuracy_committed'].tolist()
+
+    # choose nice ymin: if best accuracy near 0.99 and worst 0.8, set ymin=0.8
+    min_val = min(values) if values else 0.0
+    ymin = max(0.0, min_val - 0.03)
+    plot_series(labels, values,
+                title=f"BP Accuracy under different BP Schemes{title_suffix}",
+                outpath=os.path.join(outdir, f"bp_accuracy{kind}_overall.png"),
+                ylim_min=ymin, ylim_max=1.0)
+
+    # 2) Per-workload plots
+    for wl, g in panels(acc_df):
+        g2 = g.groupby('predictor')['accuracy_committed'].median().reset_index().sort_values('accuracy_committed')
+        labels = g2['predictor'].tolist()
+        values = g2['accuracy_committed'].tolist()
+        if not values:
+            continue
+        min_val = min(values)
+        ymin = max(0.0, min_val - 0.03)
+        fname = f"bp_accuracy{kind}_{wl}.png"
+        plot_series(labels, values,
+                    title=f"BP Accuracy — workload: {wl}{title_suffix}",
+                    outpath=os.path.join(outdir, fname),
+                    ylim_min=ymin, ylim_max=1.0)
@@ -0,0 +1,125 @@
+"""
+bp_pipeline.results
+
+Results: the collected summary rows as a pandas DataFrame with the canonical
+columns and metrics of bp_pipeline.analysis, kept in memory so a notebook can
+filter, group and summarize repeatedly without re-reading stats files.
+
+    res = collect("Stats_BP")            # or load_csv("summary_for_plots_bp.csv")
+    res.query(workload="fft.1").summary(by=["predictor", "btb_entries"])
+    res.accuracy(baseline="LocalBP")     # accuracy_summary.csv table
+    res.host_cost()                      # host ns per committed branch
+"""
+import pandas as pd
+
+from . import analysis, stats
+
+
+def _coerce_numeric(df):
+    """Object columns that hold only numbers / None become floats (as read_csv would)"""
+    for col in df.columns[df.dtypes == object]:
+        present = df[col].notna() & (df[col] != "")
+        conv = pd.to_numeric(df[col].where(present), errors="coerce")
+        if conv.notna().sum() == present.sum():
+            df[col] = conv
+    return df
+
+
+class Results:
+    """Summary rows (one per run, per stats dump or per shadow predictor)"""
+
+    def __init__(self, df, source=None):
+        self.df = analysis.add_metrics(analysis.normalize_columns(df))
+        self.source = source
+        self._ipc = {}
+        self._summaries = {}
+
+    @classmethod
+    def from_rows(cls, rows, source=None):
+        """From bp_pipeline.stats.collect_rows() dicts"""
+        df = pd.DataFrame(rows, columns=stats.columns(rows, per_dump=True))
+        return cls(_coerce_numeric(df), source)
+
+    @classmethod
+    def from_csv(cls, path):
+        """From a collector, median or accuracy_summary CSV"""
+        return cls(pd.read_csv(path), path)
+
+    def __len__(self):
+        return len(self.df)
+
+    def __repr__(self):
+        return "<Results %d rows, %d workloads, %d predictors%s>" % (
+            len(self.df), self.df["workload"].nunique(), self.df["predictor"].nunique(),
+            ", from %s" % self.source if self.source else "")
+
+    @property
+    def workloads(self):
+        return sorted(self.df["workload"].unique())
+
+    @property
+    def configs(self):
+        return sorted(self.df["config"].unique())
+
+    @property
+    def predictors(self):
+        return sorted(self.df["predictor"].unique())
+
+    def query(self, expr=None, **equals):
+        """
+        Subset of the rows: a DataFrame.query() expression and/or column=value
+        filters (a list or tuple value matches any of its elements).
+        """
+        df = self.df
+        if expr:
+            df = df.query(expr)
+        for col, val in equals.items():
+            if isinstance(val, (list, tuple, set)):
+                df = df[df[col].isin(list(val))]
+            else:
+                df = df[df[col] == val]
+        sub = Results.__new__(Results)
+        sub.df, sub.source, sub._ipc, sub._summaries = df, self.source, {}, {}
+        return sub
+
+    def with_ipc_delta(self, baseline="LocalBP"):
+        """Rows plus ipc_delta / ipc_speedup vs. baseline (cached per baseline)"""
+        if baseline not in self._ipc:
+            self._ipc[baseline] = analysis.add_ipc_delta(self.df, baseline=baseline)
+        return self._ipc[baseline]
+
+    def summary(self, by=analysis.DEFAULT_BY, metrics=None, n_boot=1000, ci=0.95, seed=0,
+                baseline="LocalBP"):
+        """analysis.summarize() of the rows (cached per argument set)"""
+        key = (tuple(by), tuple(metrics) if metrics else None, n_boot, ci, seed, baseline)
+        if key not in self._summaries:
+            missing = [c for c in by if c not in self.df.columns]
+            if missing:
+                raise KeyError("grouping columns not in results: %s" % missing)
+            df = self.with_ipc_delta(baseline) if baseline else self.df
+            self._summaries[key] = analysis.summarize(df, by=list(by), metrics=metrics,
+                                                      n_boot=n_boot, ci=ci, seed=seed)
+        return self._summaries[key]
+
+    def accuracy(self, baseline="LocalBP", n_boot=1000, ci=0.95, seed=0):
+        """Per-workload/config/predictor accuracy table (accuracy_summary.csv)"""
+        summary = self.summary(by=analysis.DEFAULT_BY, n_boot=n_boot, ci=ci, seed=seed,
+                               baseline=baseline)
+        return analysis.accuracy_table(summary, baseline)
+
+    def host_cost(self, by=analysis.DEFAULT_BY):
+        """Host ns per committed branch by simulator component (see host_profile)"""
+        return analysis.host_cost_table(self.summary(by=by, n_boot=0))
+
+    def to_csv(self, path):
+        self.df.to_csv(path, index=False)
+
+
+def collect(src="Stats_BP", per_dump=False, verbose=False):
+    """Results for every run directory under src (or a list of run directories)"""
+    rows = stats.collect_rows(src, per_dump=per_dump, verbose=verbose)
+    return Results.from_rows(rows, source=src if isinstance(src, str) else None)
+
+
+def load_csv(path):
+    return Results.from_csv(path)
@@ -0,0 +1,461 @@
+"""
+bp_pipeline.shadow
+
+Passive ("shadow") branch predictors. One gem5 run drives the pipeline with
+--bp_type; with --shadow_bp, config.py also records the committed branch
+stream (BPredUnit "Commit branch" lines of the Branch debug flag) to
+<outdir>/branch_trace.txt.gz, or with --checkpoint_interval to one
+branch_trace.seg<start>.txt.gz per gem5 process (start = instructions
+committed before its restore). replay_run() replays that stream through
+Python models of other predictors and writes their lookups/mispredictions
+to <outdir>/shadow_stats.txt, which bp_pipeline.stats turns into one
+summary row per shadow predictor.
+
+The models follow the gem5 defaults for table sizes and counter widths but
+only see committed branches (no wrong-path or speculative history updates),
+so they are for ranking predictors, not for reproducing gem5 numbers exactly.
+Only conditional branches are predicted; unconditional ones just update the
+global history as taken.
+
+Command line: shadow_bp.py.
+"""
+import gzip
+import itertools
+import os
+import re
+import time
+
+TRACE_FILE = "branch_trace.txt.gz"
+SEG_TRACE_RE = re.compile(r"^branch_trace\.seg(\d+)\.txt\.gz$")
+STATS_FILE = "shadow_stats.txt"
+
+# 1234: system.cpu.branchPred: Commit branch: sn:57, PC:0x401a2c DirectCond, pred:1, taken:1, target:0x401a10
+COMMIT_RE = re.compile(r"(system\.[\w.]*?)\.?branchPred: Commit branch: sn:\d+, PC:(0x[0-9a-fA-F]+) (\w+), "
+                       r"pred:(\d), taken:(\d)")
+CONDITIONAL = {"DirectCond", "IndirectCond"}
+
+
+# -----------------------------
+# Predictor models
+# -----------------------------
+class SatCounter:
+    """n-bit saturating counter table"""
+
+    def __init__(self, entries, bits, init=0):
+        self.max = (1 << bits) - 1
+        self.thresh = 1 << (bits - 1)
+        self.ctr = [init] * entries
+
+    def taken(self, idx):
+        return self.ctr[idx] >= self.thresh
+
+    def update(self, idx, taken):
+        c = self.ctr[idx]
+        if taken:
+            if c < self.max:
+                self.ctr[idx] = c + 1
+        elif c > 0:
+            self.ctr[idx] = c - 1
+
+
+class ShadowPredictor:
+    """predict(pc) -> bool, then update(pc, taken) for every conditional branch"""
+
+    def predict(self, pc):
+        raise NotImplementedError
+
+    def update(self, pc, taken):
+        raise NotImplementedError
+
+    def uncond(self, pc):
+        """Unconditional branch committed (only history-based models care)"""
+        pass
+
+
+class LocalBP(ShadowPredictor):
+    def __init__(self, size=2048, bits=2):
+        self.mask = size - 1
+        self.tab = SatCounter(size, bits)
+
+    def predict(self, pc):
+        return self.tab.taken(pc & self.mask)
+
+    def update(self, pc, taken):
+        self.tab.update(pc & self.mask, taken)
+
+
+class GShareBP(ShadowPredictor):
+    def __init__(self, history_bits=12, bits=2, init=1):
+        self.mask = (1 << history_bits) - 1
+        self.ghr = 0
+        self.tab = SatCounter(1 << history_bits, bits, init)
+
+    def _idx(self, pc):
+        return (pc ^ self.ghr) & self.mask
+
+    def predict(self, pc):
+        return self.tab.taken(self._idx(pc))
+
+    def update(self, pc, taken):
+        self.tab.update(self._idx(pc), taken)
+        self.ghr = ((self.ghr << 1) | taken) & self.mask
+
+    def uncond(self, pc):
+        self.ghr = ((self.ghr << 1) | 1) & self.mask
+
+
+class BiModeBP(ShadowPredictor):
+    def __init__(self, global_size=8192, choice_size=8192, bits=2):
+        self.gmask = global_size - 1
+        self.cmask = choice_size - 1
+        self.ghr = 0
+        self.choice = SatCounter(choice_size, bits)
+        self.taken_tab = SatCounter(global_size, bits, (1 << bits) - 1)
+        self.not_taken_tab = SatCounter(global_size, bits, 0)
+
+    def _lookup(self, pc):
+        use_taken = self.choice.taken(pc & self.cmask)
+        gidx = (pc ^ self.ghr) & self.gmask
+        tab = self.taken_tab if use_taken else self.not_taken_tab
+        return use_taken, gidx, tab
+
+    def predict(self, pc):
+        _, gidx, tab = self._lookup(pc)
+        return tab.taken(gidx)
+
+    def update(self, pc, taken):
+        use_taken, gidx, tab = self._lookup(pc)
+        pred = tab.taken(gidx)
+        tab.update(gidx, taken)
+        # the choice table is not trained when it disagreed with the outcome
+        # but the selected direction table was still right
+        if not (use_taken != taken and pred == taken):
+            self.choice.update(pc & self.cmask, taken)
+        self.ghr = ((self.ghr << 1) | taken) & self.gmask
+
+    def uncond(self, pc):
+        self.ghr = ((self.ghr << 1) | 1) & self.gmask
+
+
+class TournamentBP(ShadowPredictor):
+    def __init__(self, local_size=2048, local_hist_size=2048, global_size=8192,
+                 choice_size=8192, bits=2):
+        self.lh_mask = local_hist_size - 1
+        self.lp_mask = local_size - 1
+        self.g_mask = global_size - 1
+        self.c_mask = choice_size - 1
+        self.local_hist = [0] * local_hist_size
+        self.local = SatCounter(local_size, bits)
+        self.glob = SatCounter(global_size, bits)
+        self.choice = SatCounter(choice_size, bits)
+        self.ghr = 0
+
+    def _parts(self, pc):
+        lh_idx = pc & self.lh_mask
+        lidx = self.local_hist[lh_idx] & self.lp_mask
+        return lh_idx, lidx, self.ghr & self.g_mask, self.ghr & self.c_mask
+
+    def predict(self, pc):
+        _, lidx, gidx, cidx = self._parts(pc)
+        if self.choice.taken(cidx):
+            return self.glob.taken(gidx)
+        return self.local.taken(lidx)
+
+    def update(self, pc, taken):
+        lh_idx, lidx, gidx, cidx = self._parts(pc)
+        lpred, gpred = self.local.taken(lidx), self.glob.taken(gidx)
+        if lpred != gpred:
+            self.choice.update(cidx, gpred == taken)
+        self.local.update(lidx, taken)
+        self.glob.update(gidx, taken)
+        self.local_hist[lh_idx] = ((self.local_hist[lh_idx] << 1) | taken) & self.lp_mask
+        self.ghr = ((self.ghr << 1) | taken) & self.g_mask
+
+    def uncond(self, pc):
+        self.ghr = ((self.ghr << 1) | 1) & self.g_mask
+
+
+class PerceptronBP(ShadowPredictor):
+    def __init__(self, entries=1024, history=32):
+        self.mask = entries - 1
+        self.theta = int(1.93 * history + 14)
+        self.w = [[0] * (history + 1) for _ in range(entries)]
+        self.hist = [-1] * history
+
+    def _out(self, pc):
+        w = self.w[pc & self.mask]
+        return w[0] + sum(wi * hi for wi, hi in zip(w[1:], self.hist)), w
+
+    def predict(self, pc):
+        return self._out(pc)[0] >= 0
+
+    def update(self, pc, taken):
+        y, w = self._out(pc)
+        t = 1 if taken else -1
+        if (y >= 0) != taken or abs(y) <= self.theta:
+            w[0] += t
+            for i, h in enumerate(self.hist, 1):
+                w[i] += t * h
+        self._push(t)
+
+    def _push(self, t):
+        self.hist.pop()
+        self.hist.insert(0, t)
+
+    def uncond(self, pc):
+        self._push(1)
+
+
+class _Folded:
+    """Folded (compressed) global history, as in the TAGE papers"""
+
+    def __init__(self, orig_len, comp_len):
+        self.orig_len = orig_len
+        self.comp_len = comp_len
+        self.out = orig_len % comp_len
+        self.mask = (1 << comp_len) - 1
+        self.comp = 0
+
+    def update(self, hist):
+        # hist: full global history with the newest outcome in bit 0
+        c = (self.comp << 1) | (hist & 1)
+        c ^= ((hist >> self.orig_len) & 1) << self.out
+        c ^= c >> self.comp_len
+        self.comp = c & self.mask
+
+
+class TAGE(ShadowPredictor):
+    def __init__(self, log_sizes=(13, 9, 9, 9, 9, 9, 9, 9),
+                 tag_widths=(0, 9, 9, 10, 10, 11, 11, 12),
+                 min_hist=5, max_hist=130, ctr_bits=3, u_bits=2):
+        n = len(log_sizes) - 1
+        self.n = n
+        self.base = SatCounter(1 << log_sizes[0], 2, 1)
+        self.base_mask = (1 << log_sizes[0]) - 1
+        self.hist_len = [0] + [int(min_hist * (max_hist / min_hist) ** ((i - 1) / (n - 1)) + 0.5)
+                               for i in range(1, n + 1)]
+        self.log_sizes = log_sizes
+        self.tag_widths = tag_widths
+        self.ctr_max = (1 << (ctr_bits - 1)) - 1
+        self.ctr_min = -(1 << (ctr_bits - 1))
+        self.u_max = (1 << u_bits) - 1
+        # per table: [tag, ctr, u] entries
+        self.tables = [None] + [[[0, 0, 0] for _ in range(1 << log_sizes[i])] for i in range(1, n + 1)]
+        self.fi = [None] + [_Folded(self.hist_len[i], log_sizes[i]) for i in range(1, n + 1)]
+        self.ft0 = [None] + [_Folded(self.hist_len[i], tag_widths[i]) for i in range(1, n + 1)]
+        self.ft1 = [None] + [_Folded(self.hist_len[i], tag_widths[i] - 1) for i in range(1, n + 1)]
+        self.hist = 0
+        self.hist_mask = (1 << (max_hist + 1)) - 1
+        self.tick = 0
+
+    def _index(self, pc, i):
+        s = self.log_sizes[i]
+        return (pc ^ (pc >> (abs(s - i) + 1)) ^ self.fi[i].comp) & ((1 << s) - 1)
+
+    def _tag(self, pc, i):
+        return (pc ^ self.ft0[i].comp ^ (self.ft1[i].comp << 1)) & ((1 << self.tag_widths[i]) - 1)
+
+    def _lookup(self, pc):
+        idx = [0] * (self.n + 1)
+        tags = [0] * (self.n + 1)
+        provider = alt = 0
+        for i in range(1, self.n + 1):
+            idx[i] = self._index(pc, i)
+            tags[i] = self._tag(pc, i)
+        for i in range(self.n, 0, -1):
+            if self.tables[i][idx[i]][0] == tags[i]:
+                if not provider:
+                    provider = i
+                else:
+                    alt = i
+                    break
+        return idx, tags, provider, alt
+
+    def _pred(self, pc, i, idx):
+        if i == 0:
+            return self.base.taken(pc & self.base_mask)
+        return self.tables[i][idx[i]][1] >= 0
+
+    def predict(self, pc):
+        idx, _, provider, alt = self._lookup(pc)
+        return self._pred(pc, provider, idx)
+
+    def update(self, pc, taken):
+        idx, tags, provider, alt = self._lookup(pc)
+        pred = self._pred(pc, provider, idx)
+        alt_pred = self._pred(pc, alt, idx)
+
+        # allocate on a misprediction in a longer-history table
+        if pred != taken and provider < self.n:
+            allocated = False
+            for i in range(provider + 1, self.n + 1):
+                e = self.tables[i][idx[i]]
+                if e[2] == 0:
+                    e[0], e[1], e[2] = tags[i], (0 if taken else -1), 0
+                    allocated = True
+                    break
+            if not allocated:
+                for i in range(provider + 1, self.n + 1):
+                    e = self.tables[i][idx[i]]
+                    e[2] = max(e[2] - 1, 0)
+
+        # train the provider (and the base predictor when it provided)
+        if provider:
+            e = self.tables[provider][idx[provider]]
+            e[1] = min(e[1] + 1, self.ctr_max) if taken else max(e[1] - 1, self.ctr_min)
+            if pred != alt_pred:
+                e[2] = min(e[2] + 1, self.u_max) if pred == taken else max(e[2] - 1, 0)
+        else:
+            self.base.update(pc & self.base_mask, taken)
+
+        # periodic graceful reset of the useful bits
+        self.tick += 1
+        if self.tick & ((1 << 18) - 1) == 0:
+            for i in range(1, self.n + 1):
+                for e in self.tables[i]:
+                    e[2] >>= 1
+
+        self._push(taken)
+
+    def _push(self, taken):
+        self.hist = ((self.hist << 1) | int(taken)) & self.hist_mask
+        for i in range(1, self.n + 1):
+            self.fi[i].update(self.hist)
+            self.ft0[i].update(self.hist)
+            self.ft1[i].update(self.hist)
+
+    def uncond(self, pc):
+        self._push(True)
+
+
+MODELS = {
+    "LocalBP": LocalBP,
+    "GShareBP": GShareBP,
+    "BiModeBP": BiModeBP,
+    "TournamentBP": TournamentBP,
+    "PerceptronBP": PerceptronBP,
+    "TAGE": TAGE,
+}
+
+
+# -----------------------------
+# Replay
+# -----------------------------
+def segment_trace(start):
+    """Trace file name of the gem5 process resumed at `start` instructions"""
+    return "branch_trace.seg%d.txt.gz" % start
+
+
+def _commits(path):
+    """Yield (tick, match) for each "Commit branch" line"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", errors="replace") as fh:
+        for ln in fh:
+            if "Commit branch" not in ln:
+                continue
+            m = COMMIT_RE.search(ln)
+            if m:
+                yield int(ln.split(":", 1)[0]), m
+
+
+def read_trace(path, until=None):
+    """Yield (cpu, pc, branch_type, taken) for each committed branch before tick `until`"""
+    for tick, m in _commits(path):
+        if until is not None and tick >= until:
+            break
+        yield m.group(1), int(m.group(2), 16), m.group(3), m.group(5) == "1"
+
+
+def trace_segments(run_dir):
+    """
+    (path, until) of each trace to replay, in order. A killed gem5 process
+    ran past the checkpoint its successor restored, so every segment is cut
+    at the first tick of the next non-empty one.
+    """
+    segs = sorted((int(m.group(1)), f) for f in os.listdir(run_dir) for m in [SEG_TRACE_RE.match(f)] if m)
+    if not segs:
+        path = os.path.join(run_dir, TRACE_FILE)
+        return [(path, None)] if os.path.exists(path) else []
+    out, until = [], None
+    for _, f in reversed(segs):
+        path = os.path.join(run_dir, f)
+        out.append((path, until))
+        first = next(_commits(path), (None, None))[0]
+        if first is not None:
+            until = first
+    return out[::-1]
+
+
+def replay(trace, names, timed=False):
+    """
+    Run every named model over the trace (one instance per core); trace is
+    a path or a trace_segments() list.
+    Returns {name: {"lookups", "committed", "mispredicted"}}, plus the time
+    spent in each model's predict/update calls ("hostSeconds") when timed.
+    """
+    for n in names:
+        if n not in MODELS:
+            raise SystemExit(f"Unknown shadow predictor {n}; choose from {sorted(MODELS)}")
+    models = {}
+    stats = {n: {"lookups": 0, "committed": 0, "mispredicted": 0} for n in names}
+    host = dict.fromkeys(names, 0.0)
+    clock = time.perf_counter
+    segments = [(trace, None)] if isinstance(trace, str) else trace
+    for cpu, pc, btype, taken in itertools.chain.from_iterable(read_trace(p, u) for p, u in segments):
+        per_cpu = models.get(cpu)
+        if per_cpu is None:
+            per_cpu = models[cpu] = [(n, MODELS[n]()) for n in names]
+        cond = btype in CONDITIONAL
+        for n, model in per_cpu:
+            st = stats[n]
+            st["committed"] += 1
+            if timed:
+                t0 = clock()
+            if cond:
+                st["lookups"] += 1
+                if model.predict(pc) != taken:
+                    st["mispredicted"] += 1
+                model.update(pc, taken)
+            else:
+                model.uncond(pc)
+            if timed:
+                host[n] += clock() - t0
+    if timed:
+        for n in names:
+            stats[n]["hostSeconds"] = host[n]
+    return stats
+
+
+def write_stats(path, stats):
+    """gem5 text-stats style file so bp_pipeline.stats can parse it"""
+    desc = {
+        "lookups": "Number of conditional branches predicted by the shadow model (Count)",
+        "committed": "Number of committed branches seen by the shadow model (Count)",
+        "mispredicted": "Number of committed conditional branches mispredicted (Count)",
+        "mispredictDueToPredictor": "Number of committed branches mispredicted by the predictor (Count)",
+        "hostSeconds": "Host time spent in the shadow model (Second)",
+    }
+    with open(path, "w") as fh:
+        fh.write("\n---------- Begin Simulation Statistics ----------\n")
+        for name, st in stats.items():
+            st = dict(st, mispredictDueToPredictor=st["mispredicted"])
+            for key in ["lookups", "committed", "mispredicted", "mispredictDueToPredictor"]:
+                fh.write("%-50s %14d  # %s\n" % ("shadow.%s.%s" % (name, key), st[key], desc[key]))
+            if "hostSeconds" in st:
+                fh.write("%-50s %14.6f  # %s\n" % ("shadow.%s.hostSeconds" % name, st["hostSeconds"],
+                                                   desc["hostSeconds"]))
+        fh.write("\n---------- End Simulation Statistics   ----------\n")
+
+
+def replay_run(run_dir, names, timed=False):
+    """Replay run_dir's branch trace(s) and write shadow_stats.txt next to stats.txt"""
+    trace = trace_segments(run_dir)
+    if not trace:
+        print("No branch trace in", run_dir)
+        return None
+    stats = replay(trace, names, timed)
+    out = os.path.join(run_dir, STATS_FILE)
+    write_stats(out, stats)
+    print("Wrote", out)
+    return stats
+
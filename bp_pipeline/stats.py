@@ -0,0 +1,519 @@
+"""
+bp_pipeline.stats
+
+Scan Stats_BP/*/stats.txt and extract branch & performance stats that match
+the naming used in your gem5 outputs (e.g. simSeconds, simInsts,
+system.cpu.branchPred.* etc).
+
+collect_rows() returns one dict per run (or per stats dump with
+per_dump=True); write_csv() writes them as summary_for_plots_bp.csv.
+Pure Python, so collecting does not pay for pandas.
+"""
+import os, re, csv, configparser
+
+from .checkpointing import merge_dumps, read_dumps
+from .host_profile import COMPONENT_NAMES, PROFILE_FILE
+from .shadow import STATS_FILE as SHADOW_STATS
+
+# regex that matches lines like:
+# name    12345    # comment
+LINE_RE = re.compile(r"^\s*([A-Za-z0-9_.:/\-]+(::[A-Za-z0-9_]+)?)\s+([-+0-9.eE]+)")
+# every m5.stats.dump() starts a new block with this banner
+DUMP_RE = re.compile(r"^-+ Begin Simulation Statistics -+")
+
+# candidate names (covers the names seen in your stats.txt)
+CANDIDATES = {
+    "sim_seconds": ["simSeconds", "sim_seconds", "simSeconds_total"],
+    "sim_ticks": ["simTicks", "sim_ticks"],
+    "sim_insts": ["simInsts", "sim_insts", "instructions", "sim_insts"],
+    "host_seconds": ["hostSeconds"],
+    "ipc": ["system.cpu.ipc", "ipc"],
+    # branch buckets (common names observed)
+    "branch_lookups": ["system.cpu.branchPred.lookups_0::total", "system.cpu.branchPred.lookups::total", "branchPred.lookups::total", "branchPredicted", "branchLookups"],
+    "branch_committed": ["system.cpu.branchPred.committed_0::total", "system.cpu.branchPred.committed::total", "branchCommitted", "branchPred.committed"],
+    "branch_mispredicted": ["system.cpu.branchPred.mispredicted_0::total", "system.cpu.branchPred.mispredicted::total", "branchMispredicted", "branch_mispredicted"],
+    "branch_mispredict_due_predictor": ["system.cpu.branchPred.mispredictDueToPredictor_0::total", "branchPred.mispredictDueToPredictor", "mispredictDueToPredictor"],
+    # cache demand miss rates (to separate memory stalls from branch effects)
+    "l1i_miss_rate": ["system.cpu.icache.demandMissRate::total"],
+    "l1d_miss_rate": ["system.cpu.dcache.demandMissRate::total"],
+    "l2_miss_rate": ["system.l2cache.demandMissRate::total"],
+    "l3_miss_rate": ["system.l3cache.demandMissRate::total"],
+}
+
+# O3 pipeline stats behind the CPI stack (names relative to system.cpu)
+CPI_STATS = {
+    "num_cycles": "numCycles",
+    "committed_insts": "commitStats0.numInsts",
+    "rename_run_cycles": "rename.runCycles",
+    "renamed_insts": "rename.renamedInsts",
+    "rename_idle_cycles": "rename.idleCycles",
+    "rename_block_cycles": "rename.blockCycles",
+    "rename_unblock_cycles": "rename.unblockCycles",
+    "rename_serialize_stall_cycles": "rename.serializeStallCycles",
+    "rename_squash_cycles": "rename.squashCycles",
+    "fetch_squash_cycles": "fetch.squashCycles",
+    "decode_squash_cycles": "decode.squashCycles",
+    "iew_squash_cycles": "iew.squashCycles",
+    "commit_squashed_insts": "commit.commitSquashedInsts",
+    "commit_branch_mispredicts": "commit.branchMispredicts",
+    "mem_order_violations": "lsq0.memOrderViolation",
+}
+CANDIDATES.update({field: ["system.cpu." + stat] for field, stat in CPI_STATS.items()})
+CPI_STACK = ["cpi_base", "cpi_frontend", "cpi_branch", "cpi_backend", "cpi_other"]
+
+def parse_stats_dumps(path, verbose=False):
+    """Return a list of {stat: value} dicts, one per dump in stats.txt."""
+    dumps = []
+    stats = None
+    try:
+        with open(path, "r") as fh:
+            for ln in fh:
+                if DUMP_RE.match(ln):
+                    stats = {}
+                    dumps.append(stats)
+                    continue
+                m = LINE_RE.match(ln)
+                if m:
+                    if stats is None:
+                        stats = {}
+                        dumps.append(stats)
+                    key = m.group(1).strip()
+                    try:
+                        stats[key] = float(m.group(3))
+                    except:
+                        # skip non-numeric
+                        pass
+    except Exception as e:
+        if verbose: print("Failed to read", path, e)
+    return dumps
+
+def parse_stats_file(path, verbose=False):
+    """
+    Whole-run stats of a stats file. Several dumps are per-interval stats
+    (config.py --checkpoint_interval resets after every dump) and are merged
+    with checkpointing.merge_dumps, as merge_segments does for resumed runs.
+    """
+    dumps = parse_stats_dumps(path, verbose)
+    if len(dumps) <= 1:
+        return dumps[0] if dumps else {}
+    return {name: val for name, val, _ in merge_dumps(read_dumps(path))}
+
+# multi-core runs (config.py --num_cpus N) name cores system.cpu0 .. cpuN-1,
+# zero-padded by gem5 from 11 cores on (system.cpu00 ..)
+CORE_RE = re.compile(r"^system\.cpu(\d+)\.")
+PER_CORE = {
+    "ipc": "ipc",
+    "branch_lookups": "branchPred.lookups_0::total",
+    "branch_committed": "branchPred.committed_0::total",
+    "branch_mispredicted": "branchPred.mispredicted_0::total",
+    "branch_mispredict_due_predictor": "branchPred.mispredictDueToPredictor_0::total",
+    "l1i_miss_rate": "icache.demandMissRate::total",
+    "l1d_miss_rate": "dcache.demandMissRate::total",
+}
+PER_CORE.update(CPI_STATS)
+# per-core ratios are averaged rather than summed
+PER_CORE_MEAN = {"l1i_miss_rate", "l1d_miss_rate"}
+
+def add_per_core(rec, stats):
+    """
+    Add cpu<i>_<field> columns for every core found and replace the aggregate
+    fields with the sum over cores (IPC sums to system throughput; miss
+    rates are averaged).
+    Returns the per-core column names.
+    """
+    # keep gem5's digit string: cpu00 is not cpu0
+    cores = sorted({m.group(1) for m in map(CORE_RE.match, stats) if m}, key=int)
+    rec["num_cpus"] = len(cores) if cores else 1
+    cols = []
+    for field, suffix in PER_CORE.items():
+        vals = []
+        for c in cores:
+            col = "cpu%s_%s" % (c, field)
+            cols.append(col)
+            rec[col] = stats.get("system.cpu%s.%s" % (c, suffix))
+            if rec[col] is not None:
+                vals.append(rec[col])
+        if vals:
+            agg = "mean" if field in PER_CORE_MEAN else "sum"
+            rec[field] = sum(vals) / len(vals) if agg == "mean" else sum(vals)
+            rec[field + "_key"] = "%s(system.cpu*.%s)" % (agg, suffix)
+    return cols
+
+def find_best(stats, candidates):
+    # exact match
+    for cand in candidates:
+        if cand in stats:
+            return cand
+    # lowercase exact
+    low = {k.lower(): k for k in stats}
+    for cand in candidates:
+        if cand.lower() in low:
+            return low[cand.lower()]
+    # substring match
+    for cand in candidates:
+        lc = cand.lower()
+        for k in stats:
+            if lc in k.lower():
+                return k
+    return None
+
+# memory controllers: system.mem_ctrl (one channel) or system.mem_ctrl<i>
+MEM_RE = re.compile(r"^system\.mem_ctrl(\d*)\.dram\.(\w+(::total)?)$")
+MEM_SUM = {"bwTotal::total": "mem_bw_total", "bwRead::total": "mem_bw_read",
+           "bwWrite::total": "mem_bw_write", "peakBW": "mem_peak_bw_mib"}
+# gem5 reports these in percent; stored as fractions like the cache miss rates
+MEM_MEAN = {"busUtil": "mem_bus_util", "pageHitRate": "mem_row_hit_rate"}
+# latencies in ticks (ps), averaged over channels weighted by bursts read
+MEM_LAT = {"avgMemAccLat": "mem_avg_lat_ns", "avgQLat": "mem_avg_qlat_ns"}
+MEM_COLS = list(MEM_SUM.values()) + list(MEM_MEAN.values()) + list(MEM_LAT.values())
+
+def add_mem_stats(rec, stats):
+    """Memory bandwidth (Byte/s, summed over channels), utilization / row hit rate (0-1) and latency (ns)"""
+    per_ch = {}
+    for k, v in stats.items():
+        m = MEM_RE.match(k)
+        if m:
+            per_ch.setdefault(m.group(1), {})[m.group(2)] = v
+    for c in MEM_COLS:
+        rec[c] = None
+    if not per_ch:
+        return
+    chans = list(per_ch.values())
+    for stat, col in MEM_SUM.items():
+        vals = [ch[stat] for ch in chans if stat in ch]
+        rec[col] = sum(vals) if vals else None
+    for stat, col in MEM_MEAN.items():
+        vals = [ch[stat] for ch in chans if stat in ch]
+        rec[col] = sum(vals) / len(vals) / 100.0 if vals else None
+    for stat, col in MEM_LAT.items():
+        pairs = [(ch[stat], ch.get("readBursts", 1.0)) for ch in chans if stat in ch and ch[stat] == ch[stat]]
+        wsum = sum(w for _, w in pairs)
+        if wsum:
+            rec[col] = sum(v * w for v, w in pairs) / wsum / 1000.0
+
+# config.ini section (of the first core) and parameter for each sizing column
+TARGET_CONFIG = {
+    "btb_entries": (".branchPred.btb", "numEntries"),
+    "btb_assoc": (".branchPred.btb", "associativity"),
+    "ras_entries": (".branchPred.ras", "numEntries"),
+    "indirect_sets": (".branchPred.indirectBranchPred", "indirectSets"),
+    "indirect_ways": (".branchPred.indirectBranchPred", "indirectWays"),
+}
+CORE_SEC_RE = re.compile(r"^system\.cpu(\d*)$")
+CONFIG_COLS = ["cpu_clock_ghz", "sys_clock_ghz", "mem_interface", "mem_channels"] + list(TARGET_CONFIG)
+
+def add_config(rec, root):
+    """Sweep axes recorded by gem5 in config.ini (clocks, memory model, channels, BTB/RAS sizes)"""
+    for c in CONFIG_COLS:
+        rec[c] = None
+    path = os.path.join(root, "config.ini")
+    if not os.path.exists(path):
+        return
+    cfg = configparser.ConfigParser(interpolation=None, strict=False)
+    try:
+        cfg.read(path)
+    except configparser.Error:
+        return
+    ghz = lambda sec: 1000.0 / float(cfg.get(sec, "clock").split()[0]) if cfg.has_option(sec, "clock") else None
+    rec["sys_clock_ghz"] = ghz("system.clk_domain")
+    rec["cpu_clock_ghz"] = ghz("system.cpu_clk_domain") or rec["sys_clock_ghz"]
+    drams = [sec for sec in cfg.sections() if re.match(r"^system\.mem_ctrl\d*\.dram$", sec)]
+    rec["mem_channels"] = len(drams) or None
+    # config.ini only says "DRAMInterface", so label the model by its timing
+    # and width, e.g. 1600MT/s_x64_BL8 for DDR3_1600_8x8
+    if drams:
+        d = drams[0]
+        try:
+            mts = 2e6 / float(cfg.get(d, "tCK"))
+            width = int(cfg.get(d, "device_bus_width")) * int(cfg.get(d, "devices_per_rank"))
+            rec["mem_interface"] = "%dMT/s_x%d_BL%s" % (round(mts), width, cfg.get(d, "burst_length"))
+        except (configparser.Error, ValueError, ZeroDivisionError):
+            pass
+    cores = sorted((sec for sec in cfg.sections() if CORE_SEC_RE.match(sec)),
+                   key=lambda sec: int(CORE_SEC_RE.match(sec).group(1) or -1))
+    if not cores:
+        return
+    cpu = cores[0]
+    for col, (sec, opt) in TARGET_CONFIG.items():
+        if cfg.has_option(cpu + sec, opt):
+            rec[col] = int(cfg.get(cpu + sec, opt))
+
+# branch classes -> gem5 BranchType buckets of the per-type branchPred stats
+BRANCH_CLASSES = {
+    "cond": ["DirectCond"],
+    "uncond": ["DirectUncond"],
+    "indirect": ["IndirectCond", "IndirectUncond"],
+    "call": ["CallDirect", "CallIndirect"],
+    "return": ["Return"],
+}
+# per-class field -> stat vector (relative to branchPred)
+CLASS_STATS = {
+    "committed": "committed_0",
+    "mispredicted": "mispredicted_0",
+    "btb_miss_mispredicted": "mispredictDueToBTBMiss_0",
+    "btb_misses": "btb.misses",
+    "target_wrong": "targetWrong_0",
+}
+CLASS_COLS = ["%s_%s" % (cls, f) for cls in BRANCH_CLASSES for f in list(CLASS_STATS) + ["mpki"]]
+# target-structure field -> stat names; ipred_* is the indirect target predictor (relative to branchPred, first match wins)
+TARGET_STATS = {
+    "btb_lookups": ["btb.lookups::total", "BTBLookups"],
+    "btb_hits": ["BTBHits"],
+    "btb_misses": ["btb.misses::total"],
+    "btb_miss_mispredicted": ["mispredictDueToBTBMiss_0::total"],
+    "ras_used": ["ras.used", "usedRAS"],
+    "ras_correct": ["ras.correct"],
+    "ras_incorrect": ["ras.incorrect", "RASInCorrect"],
+    "ipred_lookups": ["indirectLookups"],
+    "ipred_hits": ["indirectHits"],
+    "ipred_mispredicted": ["indirectMispredicted"],
+    "target_from_btb": ["targetProvider_0::BTB"],
+    "target_from_ras": ["targetProvider_0::RAS"],
+    "target_from_indirect": ["targetProvider_0::Indirect"],
+}
+TARGET_COLS = list(TARGET_STATS) + ["btb_hit_rate", "btb_mpki", "ras_accuracy", "ipred_hit_rate"]
+BP_RE = re.compile(r"^system\.cpu\d*\.branchPred\.(.+)$")
+
+def add_branch_classes(rec, stats):
+    """
+    Per-branch-class counts (summed over cores) plus BTB, RAS and indirect
+    predictor metrics. <class>_btb_miss_mispredicted counts mispredicts whose
+    target came from a BTB miss and <class>_target_wrong counts squashes
+    with a wrong predicted target (e.g. RAS corruption on the wrong path), so
+    the call/return columns separate target-structure cost from the
+    direction predictor (cond).
+    """
+    bp = {}
+    for k, v in stats.items():
+        m = BP_RE.match(k)
+        if m:
+            bp[m.group(1)] = bp.get(m.group(1), 0.0) + v
+    kinsts = (rec.get("sim_insts") or 0) / 1000.0
+    for cls, types in BRANCH_CLASSES.items():
+        for field, stat in CLASS_STATS.items():
+            vals = [bp[k] for k in ("%s::%s" % (stat, t) for t in types) if k in bp]
+            rec["%s_%s" % (cls, field)] = sum(vals) if vals else None
+        mis = rec["%s_mispredicted" % cls]
+        rec["%s_mpki" % cls] = mis / kinsts if mis is not None and kinsts else None
+    for field, names in TARGET_STATS.items():
+        rec[field] = next((bp[n] for n in names if n in bp), None)
+    ratio = lambda a, b: a / b if a is not None and b else None
+    if rec["btb_hits"] is None and rec["btb_lookups"] is not None and rec["btb_misses"] is not None:
+        rec["btb_hits"] = rec["btb_lookups"] - rec["btb_misses"]
+    rec["btb_hit_rate"] = ratio(rec["btb_hits"], rec["btb_lookups"])
+    rec["btb_mpki"] = ratio(rec["btb_misses"], kinsts)
+    rec["ras_accuracy"] = ratio(rec["ras_correct"], rec["ras_used"])
+    rec["ipred_hit_rate"] = ratio(rec["ipred_hits"], rec["ipred_lookups"])
+
+HOST_COLS = ["host_samples", "host_branches"] + ["host_%s_seconds" % c for c in COMPONENT_NAMES]
+
+def add_host_profile(rec, root):
+    """Host-time breakdown by simulator component from <run>/host_profile.txt"""
+    for c in HOST_COLS:
+        rec[c] = None
+    path = os.path.join(root, PROFILE_FILE)
+    if not os.path.exists(path):
+        return
+    prof = parse_stats_file(path)
+    rec["host_samples"] = prof.get("host.samples::total")
+    rec["host_branches"] = prof.get("host.branches")
+    for c in COMPONENT_NAMES:
+        rec["host_%s_seconds" % c] = prof.get("host.seconds::" + c)
+
+def add_rates(rec):
+    """misprediction rates from the branch counts in rec"""
+    try:
+        committed = rec.get("branch_committed")
+        mis = rec.get("branch_mispredicted")
+        lookups = rec.get("branch_lookups")
+        if mis is not None and committed:
+            rec["mispred_rate_committed"] = float(mis) / float(committed) if committed else None
+        else:
+            rec["mispred_rate_committed"] = None
+        if mis is not None and lookups:
+            rec["mispred_rate_lookup"] = float(mis) / float(lookups) if lookups else None
+        else:
+            rec["mispred_rate_lookup"] = None
+        if mis is not None and rec.get("sim_insts"):
+            rec["mispred_per_kinst"] = float(mis) / (float(rec["sim_insts"]) / 1000.0)
+        else:
+            rec["mispred_per_kinst"] = None
+    except Exception:
+        rec["mispred_rate_committed"] = rec["mispred_rate_lookup"] = rec["mispred_per_kinst"] = None
+
+def add_cpi_stack(rec):
+    """
+    CPI stack from the rename stage, whose cycles are partitioned into run,
+    idle, blocked/unblocking, serialize-stall and squash cycles:
+      cpi_base      rename running on instructions that commit
+                    (run cycles x committed/renamed)
+      cpi_frontend  rename idle (fetch/icache starvation) minus branch refill
+      cpi_branch    rename squashing + fetch squashing + rename running on
+                    wrong-path instructions after a branch mispredict (fetch
+                    squash and wrong-path cycles scaled by the branch share of
+                    squashes; memory-order violations make up the rest)
+      cpi_backend   rename blocked/unblocking/serializing: ROB/IQ/LSQ full,
+                    i.e. mostly memory stalls for mm
+      cpi_other     cycles not covered above: CPU idle and the wrong-path
+                    work after memory-order violations
+    Refill cycles that show up as rename idle after the squash stay in
+    cpi_frontend, so cpi_branch still slightly understates the mispredict
+    cost.
+    """
+    cols = ["cpi_total"] + CPI_STACK + ["branch_squash_cycles", "cycles_per_mispredict",
+                                        "squashed_insts_per_mispredict", "memory_stall_share"]
+    for c in cols:
+        rec[c] = None
+    insts = rec.get("committed_insts") or rec.get("sim_insts")
+    cycles = rec.get("num_cycles")
+    if not insts or not cycles or rec.get("rename_run_cycles") is None:
+        return
+    g = lambda k: rec.get(k) or 0.0
+    mispred = g("commit_branch_mispredicts")
+    violations = g("mem_order_violations")
+    branch_share = mispred / (mispred + violations) if mispred + violations else 0.0
+    refill = min(g("fetch_squash_cycles") * branch_share, g("rename_idle_cycles"))
+    # rename run cycles spent on instructions that are squashed later
+    renamed = g("renamed_insts")
+    useful = min(insts / renamed, 1.0) if renamed else 1.0
+    wrong_path = g("rename_run_cycles") * (1.0 - useful)
+    branch = g("rename_squash_cycles") + refill + wrong_path * branch_share
+    backend = g("rename_block_cycles") + g("rename_unblock_cycles") + g("rename_serialize_stall_cycles")
+    rec["cpi_total"] = cycles / insts
+    rec["cpi_base"] = g("rename_run_cycles") * useful / insts
+    rec["cpi_frontend"] = (g("rename_idle_cycles") - refill) / insts
+    rec["cpi_branch"] = branch / insts
+    rec["cpi_backend"] = backend / insts
+    rec["cpi_other"] = rec["cpi_total"] - sum(rec[c] for c in CPI_STACK[:-1])
+    rec["branch_squash_cycles"] = branch
+    rec["memory_stall_share"] = backend / cycles
+    if mispred:
+        rec["cycles_per_mispredict"] = branch / mispred
+        rec["squashed_insts_per_mispredict"] = g("commit_squashed_insts") / mispred
+
+def shadow_rows(rec, root):
+    """One row per shadow predictor in <run>/shadow_stats.txt (see bp_pipeline.shadow)"""
+    path = os.path.join(root, SHADOW_STATS)
+    if not os.path.exists(path):
+        return []
+    stats = parse_stats_file(path)
+    names = sorted({k.split(".")[1] for k in stats if k.startswith("shadow.")})
+    out = []
+    for name in names:
+        srec = {k: rec.get(k) for k in ["run_dir", "run_folder", "cpu", "config", "workload", "stats_path", "dump",
+                                        "sim_seconds_key", "sim_seconds", "sim_ticks_key", "sim_ticks",
+                                        "sim_insts_key", "sim_insts", "num_cpus"]}
+        srec["predictor"] = name
+        srec["shadow_of"] = rec.get("predictor")
+        for field, stat in [("branch_lookups", "lookups"), ("branch_committed", "committed"),
+                            ("branch_mispredicted", "mispredicted"),
+                            ("branch_mispredict_due_predictor", "mispredictDueToPredictor")]:
+            key = "shadow.%s.%s" % (name, stat)
+            srec[field + "_key"] = key if key in stats else ""
+            srec[field] = stats.get(key)
+        # time in the Python model itself (shadow_bp.py --timed); not a gem5 cost
+        srec["shadow_model_seconds"] = stats.get("shadow.%s.hostSeconds" % name)
+        add_rates(srec)
+        out.append(srec)
+    return out
+
+def run_record(root, stats, dump_idx=""):
+    """One summary row for the stats of run directory root"""
+    rec = {"run_dir": root, "stats_path": os.path.join(root, "stats.txt"), "dump": dump_idx}
+
+    # detect keys
+    for field, candlist in CANDIDATES.items():
+        found = find_best(stats, candlist)
+        rec[field + "_key"] = found if found else ""
+        rec[field] = stats.get(found) if found and found in stats else None
+    add_per_core(rec, stats)
+
+    # some metadata from folder name
+    run_folder = os.path.basename(root.rstrip("/"))
+    rec["run_folder"] = run_folder
+    toks = re.split(r'[_\-]', run_folder)
+    # O3CPUx4+ddr4+ras4 -> cpu O3CPUx4, config ddr4+ras4 (Sweep mem/target tags)
+    cpu_toks = toks[0].split("+") if len(toks) > 0 else [""]
+    rec["cpu"] = cpu_toks[0]
+    rec["config"] = "+".join(cpu_toks[1:]) or "default"
+    rec["predictor"] = toks[1] if len(toks) > 1 else ""
+    rec["workload"] = "_".join(toks[2:]) if len(toks) > 2 else os.path.basename(os.path.dirname(root))
+
+    # derived metrics
+    try:
+        if rec.get("ipc") is None and rec.get("sim_insts") and rec.get("sim_seconds"):
+            rec["IPC_calc"] = float(rec["sim_insts"]) / (rec["sim_seconds"] * (rec.get("sim_ticks")/rec.get("sim_seconds") if rec.get("sim_seconds") else 1.0))
+        else:
+            rec["IPC_calc"] = rec.get("ipc")
+    except Exception:
+        rec["IPC_calc"] = rec.get("ipc")
+
+    add_rates(rec)
+    add_cpi_stack(rec)
+    add_mem_stats(rec, stats)
+    add_branch_classes(rec, stats)
+    add_config(rec, root)
+    add_host_profile(rec, root)
+    return rec
+
+def collect_rows(src="Stats_BP", per_dump=False, verbose=False):
+    """
+    Summary rows for every run directory (one containing stats.txt) under
+    src, which may also be a list of directories (e.g. the run directories
+    returned by bp_pipeline.launch). Shadow-predictor rows follow the row of
+    the run they were replayed from; with per_dump they follow its last dump
+    (their counts cover the whole run).
+    """
+    srcs = [src] if isinstance(src, str) else list(src)
+    rows = []
+    for top in srcs:
+        if not os.path.isdir(top):
+            raise FileNotFoundError("Source dir not found: %s" % top)
+        for root, dirs, files in sorted(os.walk(top)):
+            if "stats.txt" not in files:
+                continue
+            stats_path = os.path.join(root, "stats.txt")
+            if per_dump:
+                samples = list(enumerate(parse_stats_dumps(stats_path, verbose)))
+            else:
+                samples = [("", parse_stats_file(stats_path, verbose))]
+            rec = None
+            for dump_idx, stats in samples:
+                rec = run_record(root, stats, dump_idx)
+                rows.append(rec)
+            if rec is not None:
+                rows.extend(shadow_rows(rec, root))
+    return rows
+
+CORE_COL_RE = re.compile(r"^cpu(\d+)_")
+
+def columns(rows, per_dump=False):
+    """CSV column order for rows: fixed columns, then per-core ones"""
+    outcols = [
+        "run_dir","run_folder","cpu","config","predictor","workload","stats_path",
+        "sim_seconds_key","sim_seconds","sim_ticks_key","sim_ticks","sim_insts_key","sim_insts",
+        "ipc_key","ipc","IPC_calc",
+        "branch_lookups_key","branch_lookups","branch_committed_key","branch_committed",
+        "branch_mispredicted_key","branch_mispredicted","branch_mispredict_due_predictor_key","branch_mispredict_due_predictor",
+        "mispred_rate_committed","mispred_rate_lookup","mispred_per_kinst",
+        "l1i_miss_rate","l1d_miss_rate","l2_miss_rate","l3_miss_rate",
+        "num_cpus","shadow_of"
+    ] + list(CPI_STATS) + ["cpi_total"] + CPI_STACK + [
+        "branch_squash_cycles","cycles_per_mispredict","squashed_insts_per_mispredict","memory_stall_share"
+    ] + MEM_COLS + CLASS_COLS + TARGET_COLS + CONFIG_COLS + ["host_seconds"] + HOST_COLS + ["shadow_model_seconds"]
+    if per_dump:
+        outcols.insert(outcols.index("stats_path") + 1, "dump")
+    for r in rows:
+        for col in r:
+            if CORE_COL_RE.match(col) and col not in outcols:
+                outcols.append(col)
+    return outcols
+
+def write_csv(rows, path, per_dump=False):
+    outcols = columns(rows, per_dump)
+    with open(path, "w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=outcols)
+        writer.writeheader()
+        for r in rows:
+            out = {k: r.get(k, "") for k in outcols}
+            writer.writerow(out)
@@ -0,0 +1,137 @@
+"""
+bp_pipeline.sweep
+
+Sweep: the cross product of CPU types, branch predictors, workloads, core
+counts and memory / branch-target configurations that script.py runs, as an
+object that can be built, inspected and launched from Python.
+
+    sweep = Sweep(bp_types=["LocalBP", "TAGE"], workloads=["Binaries/fft.1"],
+                  target_configs={"": [], "ras4": ["--ras_entries=4"]})
+    for run_dir, cmd in sweep.runs(): ...
+    run_dirs = launch(sweep)
+"""
+import itertools
+import os
+import subprocess
+
+from . import host_profile as hp
+from .checkpointing import run_with_resume
+from .shadow import replay_run
+
+BP_TYPES = ["BiModeBP", "LocalBP", "TournamentBP", "TAGE", "LTAGE", "GShareBP", "PerceptronBP"]
+WORKLOADS = [
+    "Binaries/mm",   # compute-heavy
+    "Binaries/branchy_test",   # branch-heavy
+    "Binaries/fft.1",            # another compute-heavy
+]
+
+
+class Sweep:
+    """
+    Run configurations of one sweep. mt_workloads maps a core count to the
+    pthread workloads run with that many cores; mem_configs and
+    target_configs map a tag to extra config.py arguments, and a non-empty
+    tag is appended to the CPU part of the run folder (O3CPU+ras4_TAGE_mm).
+    host_profile runs gem5 under perf (see host_profile) and times the
+    shadow models; it raises FileNotFoundError here when perf is missing.
+    """
+
+    def __init__(self, bp_types=None, workloads=None, cpu_types=("O3CPU",), mt_workloads=None,
+                 max_insts=100_000_000, mem_configs=None, target_configs=None, shadow_bps=(),
+                 checkpoint_interval=None, keep_checkpoints=2, max_restarts=10,
+                 gem5_path="build/X86/gem5.opt", config="config.py", stats_dir="Stats_BP",
+                 extra_args=(), host_profile=False, profile_freq=hp.DEFAULT_FREQ):
+        self.bp_types = list(bp_types or BP_TYPES)
+        self.workloads = list(workloads or WORKLOADS)
+        self.cpu_types = list(cpu_types)
+        self.mt_workloads = dict(mt_workloads or {})
+        self.max_insts = max_insts
+        self.mem_configs = dict(mem_configs or {"": []})
+        self.target_configs = dict(target_configs or {"": []})
+        self.shadow_bps = list(shadow_bps)
+        self.checkpoint_interval = checkpoint_interval
+        self.keep_checkpoints = keep_checkpoints
+        self.max_restarts = max_restarts
+        self.gem5_path = gem5_path
+        self.config = config
+        self.stats_dir = stats_dir
+        self.extra_args = list(extra_args)
+        self.host_profile = host_profile
+        self.profile_freq = profile_freq
+        if host_profile:
+            hp.check_perf()
+
+    def core_runs(self):
+        """(num_cpus, workload) pairs; single-core runs keep their original folders"""
+        runs = [(1, w) for w in self.workloads]
+        for ncpu, wls in self.mt_workloads.items():
+            runs += [(ncpu, w) for w in wls]
+        return runs
+
+    def runs(self):
+        """(run_dir, gem5 command list) for every configuration, in launch order"""
+        out = []
+        for cpu_type in self.cpu_types:
+            for bp_type in self.bp_types:
+                for (num_cpus, workload), (mem_tag, mem_args), (tgt_tag, tgt_args) in itertools.product(
+                        self.core_runs(), self.mem_configs.items(), self.target_configs.items()):
+                    # Extract workload name without path
+                    workload_name = os.path.basename(workload)
+                    cpu_tag = cpu_type if num_cpus == 1 else f"{cpu_type}x{num_cpus}"
+                    for tag in [mem_tag, tgt_tag]:
+                        if tag:
+                            cpu_tag += f"+{tag}"
+                    run_dir = os.path.join(self.stats_dir, f"{cpu_tag}_{bp_type}_{workload_name}")
+
+                    # Construct the gem5 command
+                    cmd = [
+                        self.gem5_path,
+                        "-d", run_dir,
+                        self.config,
+                        f"--cpu_type={cpu_type}",
+                        f"--bp_type={bp_type}",
+                        workload,
+                    ]
+                    if self.max_insts:
+                        cmd.append(f"--maxinsts={self.max_insts}")
+                    if num_cpus > 1:
+                        cmd += [f"--num_cpus={num_cpus}", f"--options={num_cpus}"]
+                    cmd += mem_args + tgt_args + self.extra_args
+                    if self.shadow_bps:
+                        cmd.append(f"--shadow_bp={','.join(self.shadow_bps)}")
+                    if self.checkpoint_interval:
+                        cmd += [f"--checkpoint_interval={self.checkpoint_interval}",
+                                f"--keep_checkpoints={self.keep_checkpoints}"]
+                    if self.host_profile:
+                        cmd = hp.profile_cmd(cmd, run_dir, self.profile_freq)
+                    out.append((run_dir, cmd))
+        return out
+
+    def __len__(self):
+        return len(self.runs())
+
+
+def launch(sweep, dry_run=False):
+    """
+    Run every configuration of sweep one after another (with checkpoint
+    resume when sweep.checkpoint_interval is set, then the shadow replay and
+    host-profile attribution).
+    Returns the run directories, ready for bp_pipeline.collect().
+    """
+    run_dirs = []
+    for run_dir, cmd in sweep.runs():
+        run_dirs.append(run_dir)
+        if dry_run:
+            print("Would run:", " ".join(cmd))
+            continue
+        os.makedirs(run_dir, exist_ok=True)
+        if sweep.checkpoint_interval:
+            run_with_resume(cmd, run_dir, sweep.checkpoint_interval, sweep.max_restarts)
+        else:
+            print("Running:", " ".join(cmd))
+            subprocess.call(cmd)
+        if sweep.shadow_bps:
+            replay_run(run_dir, sweep.shadow_bps, timed=sweep.host_profile)
+        if sweep.host_profile:
+            hp.profile_run(run_dir)
+    return run_dirs
@@ -27,14 +27,61 @@
 
 """ Caches with options for a simple gem5 configuration script
 
-This file contains L1 I/D and L2 caches to be used in the simple
-gem5 configuration script. It uses the SimpleOpts wrapper to set up command
-line options from each individual class.
+This file contains L1 I/D, L2 and an optional L3 cache to be used in the
+simple gem5 configuration script. Associativity, latencies, MSHRs and an
+optional hardware prefetcher can be overridden per level from the options
+object (the parsed config.py arguments) passed to each class.
 """
 
 import m5
+import m5.objects
 from m5.objects import Cache
 
+# Parameters that can be overridden per level from the command line as
+# --<level>_<param>, e.g. --l1_assoc, --l2_mshrs, --l3_tag_latency
+CACHE_PARAMS = ["assoc", "tag_latency", "data_latency", "response_latency",
+                "mshrs", "tgts_per_mshr"]
+
+# --<cache>_prefetcher choices -> gem5 prefetcher SimObject names
+PREFETCHERS = {
+    "stride": "StridePrefetcher",
+    "tagged": "TaggedPrefetcher",
+    "bop": "BOPPrefetcher",
+    "ampm": "AMPMPrefetcher",
+    "dcpt": "DCPTPrefetcher",
+    "spp": "SignaturePathPrefetcher",
+}
+
+
+def applyCacheOpts(cache, opts, level):
+    """Override class defaults from opts.<level>_<param> (or legacy opts.assoc)"""
+    if not opts:
+        return
+    if getattr(opts, "assoc", None):
+        cache.assoc = opts.assoc
+    for param in CACHE_PARAMS:
+        val = getattr(opts, "%s_%s" % (level, param), None)
+        if val:
+            setattr(cache, param, val)
+
+
+def makePrefetcher(name):
+    """Return a prefetcher SimObject for a PREFETCHERS key, or None"""
+    if not name or name == "none":
+        return None
+    cls = getattr(m5.objects, PREFETCHERS[name], None)
+    if cls is None:
+        print("Warning: %s not available in this gem5 build." % PREFETCHERS[name])
+        return None
+    return cls()
+
+
+def applyPrefetcher(cache, opts, name):
+    """Attach the prefetcher selected by opts.<name>_prefetcher, if any"""
+    pf = makePrefetcher(getattr(opts, name + "_prefetcher", None) if opts else None)
+    if pf is not None:
+        cache.prefetcher = pf
+
 # -----------------------------
 # Cache base class
 # -----------------------------
@@ -51,8 +98,7 @@ class L1Cache(Cache):
     def __init__(self, opts=None):
         super(L1Cache, self).__init__()
         # If opts provided, override defaults
-        if opts and hasattr(opts, "assoc") and opts.assoc:
-            self.assoc = opts.assoc
+        applyCacheOpts(self, opts, "l1")
 
     def connectBus(self, bus):
         """Connect this cache to a memory-side bus"""
@@ -73,6 +119,7 @@ class L1ICache(L1Cache):
         super(L1ICache, self).__init__(opts)
         if opts and hasattr(opts, "l1i_size") and opts.l1i_size:
             self.size = opts.l1i_size
+        applyPrefetcher(self, opts, "l1i")
 
     def connectCPU(self, cpu):
         self.cpu_side = cpu.icache_port
@@ -88,6 +135,7 @@ class L1DCache(L1Cache):
         super(L1DCache, self).__init__(opts)
         if opts and hasattr(opts, "l1d_size") and opts.l1d_size:
             self.size = opts.l1d_size
+        applyPrefetcher(self, opts, "l1d")
 
     def connectCPU(self, cpu):
         self.cpu_side = cpu.dcache_port
@@ -109,8 +157,34 @@ class L2Cache(Cache):
         super(L2Cache, self).__init__()
         if opts and hasattr(opts, "l2_size") and opts.l2_size:
             self.size = opts.l2_size
-        if opts and hasattr(opts, "assoc") and opts.assoc:
-            self.assoc = opts.assoc
+        applyCacheOpts(self, opts, "l2")
+        applyPrefetcher(self, opts, "l2")
+
+    def connectCPUSideBus(self, bus):
+        self.cpu_side = bus.mem_side_ports
+
+    def connectMemSideBus(self, bus):
+        self.mem_side = bus.cpu_side_ports
+
+
+# -----------------------------
+# L3 cache (optional, see --l3_size)
+# -----------------------------
+class L3Cache(Cache):
+    size = "2MB"
+    assoc = 16
+    tag_latency = 40
+    data_latency = 40
+    response_latency = 40
+    mshrs = 32
+    tgts_per_mshr = 12
+
+    def __init__(self, opts=None):
+        super(L3Cache, self).__init__()
+        if opts and hasattr(opts, "l3_size") and opts.l3_size:
+            self.size = opts.l3_size
+        applyCacheOpts(self, opts, "l3")
+        applyPrefetcher(self, opts, "l3")
 
     def connectCPUSideBus(self, bus):
         self.cpu_side = bus.mem_side_ports
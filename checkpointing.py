@@ -0,0 +1,7 @@
+"""
+checkpointing.py
+
+Checkpoint / resume helpers, kept importable under their old name. The
+implementation lives in bp_pipeline.checkpointing.
+"""
+from bp_pipeline.checkpointing import *  # noqa: F401,F403
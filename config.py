@@ -25,13 +25,15 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-""" This file creates a single CPU and a two-level cache system.
+""" This file creates one or more O3 CPUs (--num_cpus) with private L1s
+sharing a two-level (optionally three-level) cache system.
 This script takes a single parameter which specifies a binary to execute.
 If none is provided it executes 'hello' by default (mostly used for testing)
 
 See Part 1, Chapter 3: Adding cache to the configuration script in the
 learning_gem5 book for more information about this script.
-This file exports options for the L1 I/D and L2 cache sizes.
+This file exports options for the L1 I/D, L2 and optional L3 caches (sizes,
+associativity, latencies, MSHRs and prefetchers).
 
 IMPORTANT: If you modify this file, it's likely that the Learning gem5 book
            also needs to be updated. For now, email Jason <power.jg@gmail.com>
@@ -41,6 +43,8 @@ IMPORTANT: If you modify this file, it's likely that the Learning gem5 book
 # import the m5 (gem5) library created when gem5 is built
 import m5
 import os
+import math
+import shutil
 import argparse
 
 # import all of the SimObjects
@@ -49,6 +53,8 @@ from m5.objects.BranchPredictor import *
 
 # import our cache definitions
 from caches import *
+from bp_pipeline.checkpointing import checkpoint_insts, checkpoint_name, rotate_checkpoints
+from bp_pipeline.shadow import MODELS as SHADOW_MODELS, TRACE_FILE, segment_trace
 
 # -----------------------------
 # Argument parsing (replaces SimpleOpts)
@@ -70,17 +76,105 @@ parser.add_argument("--cpu_type", default="O3CPU",
 parser.add_argument("--bp_type", default="LocalBP",
                     help="Branch Prediction Type (default: LocalBP)")
 
+# Branch target prediction structures, applied to every --bp_type (unset
+# keeps the gem5 defaults: 4096-entry direct-mapped BTB, 16-entry RAS,
+# 256x2 indirect predictor)
+parser.add_argument("--btb_entries", type=int, default=None,
+                    help="BTB entries (power of two)")
+parser.add_argument("--btb_assoc", type=int, default=None,
+                    help="BTB associativity")
+parser.add_argument("--btb_tag_bits", type=int, default=None,
+                    help="BTB tag bits")
+parser.add_argument("--ras_entries", type=int, default=None,
+                    help="Return address stack entries")
+parser.add_argument("--indirect_sets", type=int, default=None,
+                    help="Indirect predictor sets (power of two)")
+parser.add_argument("--indirect_ways", type=int, default=None,
+                    help="Indirect predictor ways")
+parser.add_argument("--indirect_tag_bits", type=int, default=None,
+                    help="Indirect predictor tag bits")
+parser.add_argument("--indirect_path_length", type=int, default=None,
+                    help="Indirect predictor path history length")
+parser.add_argument("--indirect_ghr_bits", type=int, default=None,
+                    help="Indirect predictor global history bits")
+
+# Shadow predictors: record the committed branch stream so shadow_bp.py can
+# replay it through these models after the run
+parser.add_argument("--shadow_bp", default="",
+                    help="Comma-separated passive predictors (%s)" % ",".join(sorted(SHADOW_MODELS)))
+
+# Number of O3 cores (each gets private L1s and its own branch predictor)
+parser.add_argument("--num_cpus", type=int, default=1,
+                    help="Number of CPU cores sharing the L2 (default: 1)")
+
+# Workload arguments (e.g. thread count for the *_mt binaries)
+parser.add_argument("--options", default="",
+                    help="Arguments passed to the workload binary, quoted")
+
 # Max instructions (ROI control)
 parser.add_argument("--maxinsts", type=int, default=None,
                     help="Maximum number of instructions to simulate")
 
+# Periodic checkpoints (see bp_pipeline.checkpointing / script.py for resuming)
+parser.add_argument("--checkpoint_interval", type=int, default=None,
+                    help="Take a checkpoint every N committed instructions")
+parser.add_argument("--keep_checkpoints", type=int, default=2,
+                    help="Number of newest checkpoints to keep (default: 2)")
+parser.add_argument("--restore_from", default=None,
+                    help="Checkpoint directory (cpt.<insts>) to resume from")
+
+# Clocks
+parser.add_argument("--sys_clock", default="1GHz",
+                    help="System (L2, buses, memory controller) clock (default: 1GHz)")
+parser.add_argument("--cpu_clock", default=None,
+                    help="CPU core and L1 clock (default: same as --sys_clock)")
+
+# Main memory
+parser.add_argument("--mem_type", default="DDR3_1600_8x8",
+                    help="DRAM interface, e.g. DDR3_1600_8x8, DDR4_2400_16x4, "
+                         "LPDDR3_1600_1x32, LPDDR5_5500_1x16_8B_BL32, HBM_1000_4H_1x128 "
+                         "(default: DDR3_1600_8x8)")
+parser.add_argument("--mem_channels", type=int, default=1,
+                    help="Number of memory channels, cache-line interleaved (default: 1)")
+parser.add_argument("--mem_size", default="1024MB", help="Physical memory size")
+
 # Cache sizes (optional, matches SimpleOpts style)
 parser.add_argument("--l1i_size", default="16kB", help="L1 instruction cache size")
 parser.add_argument("--l1d_size", default="64kB", help="L1 data cache size")
 parser.add_argument("--l2_size", default="256kB", help="L2 cache size")
+parser.add_argument("--l3_size", default=None, help="L3 cache size (default: no L3)")
+
+# Cache parameters (unset keeps the defaults in caches.py)
+parser.add_argument("--assoc", type=int, default=None,
+                    help="Associativity for every cache level")
+for level in ["l1", "l2", "l3"]:
+    for param in CACHE_PARAMS:
+        parser.add_argument("--%s_%s" % (level, param), type=int, default=None,
+                            help="%s %s" % (level.upper(), param))
+
+# Hardware prefetchers
+for cache in ["l1i", "l1d", "l2", "l3"]:
+    parser.add_argument("--%s_prefetcher" % cache, default="none",
+                        choices=["none"] + sorted(PREFETCHERS),
+                        help="%s prefetcher (default: none)" % cache.upper())
 
 args = parser.parse_args()
 
+dram_class = getattr(m5.objects, args.mem_type, None)
+if dram_class is None or not issubclass(dram_class, DRAMInterface):
+    parser.error("unknown DRAM interface %s" % args.mem_type)
+if args.mem_channels < 1 or args.mem_channels & (args.mem_channels - 1):
+    parser.error("--mem_channels must be a power of two")
+for opt in ["btb_entries", "indirect_sets"]:
+    val = getattr(args, opt)
+    if val is not None and (val < 1 or val & (val - 1)):
+        parser.error("--%s must be a power of two" % opt)
+
+shadow_bps = [n.strip() for n in args.shadow_bp.split(",") if n.strip()]
+for n in shadow_bps:
+    if n not in SHADOW_MODELS:
+        parser.error("unknown shadow predictor %s" % n)
+
 # -----------------------------
 # System configuration
 # -----------------------------
@@ -88,26 +182,40 @@ system = System()
 
 # Clock and voltage
 system.clk_domain = SrcClockDomain()
-system.clk_domain.clock = "1GHz"
+system.clk_domain.clock = args.sys_clock
 system.clk_domain.voltage_domain = VoltageDomain()
 
 # Memory
 system.mem_mode = "timing"
-system.mem_ranges = [AddrRange("1024MB")]
+system.mem_ranges = [AddrRange(args.mem_size)]
 
-# CPU
-system.cpu = X86O3CPU()
+# CPUs: a single core keeps the "system.cpu" stat names, N cores become
+# system.cpu0 .. system.cpu<N-1>
+if args.num_cpus > 1:
+    system.cpu = [X86O3CPU(cpu_id=i) for i in range(args.num_cpus)]
+    cpus = system.cpu
+else:
+    system.cpu = X86O3CPU()
+    cpus = [system.cpu]
 
-# L1 caches
-system.cpu.icache = L1ICache(args)
-system.cpu.dcache = L1DCache(args)
-system.cpu.icache.connectCPU(system.cpu)
-system.cpu.dcache.connectCPU(system.cpu)
+# Separate core clock (the L1s are children of the CPU and follow it)
+if args.cpu_clock:
+    system.cpu_clk_domain = SrcClockDomain(clock=args.cpu_clock,
+                                           voltage_domain=system.clk_domain.voltage_domain)
+    for cpu in cpus:
+        cpu.clk_domain = system.cpu_clk_domain
 
-# L2 bus
+# L2 bus (shared by every core's L1s)
 system.l2bus = L2XBar()
-system.cpu.icache.connectBus(system.l2bus)
-system.cpu.dcache.connectBus(system.l2bus)
+
+# Private L1 caches
+for cpu in cpus:
+    cpu.icache = L1ICache(args)
+    cpu.dcache = L1DCache(args)
+    cpu.icache.connectCPU(cpu)
+    cpu.dcache.connectCPU(cpu)
+    cpu.icache.connectBus(system.l2bus)
+    cpu.dcache.connectBus(system.l2bus)
 
 # L2 cache
 system.l2cache = L2Cache(args)
@@ -115,64 +223,163 @@ system.l2cache.connectCPUSideBus(system.l2bus)
 
 # Main memory bus
 system.membus = SystemXBar()
-system.l2cache.connectMemSideBus(system.membus)
+
+# Optional L3 between the L2 and main memory
+if args.l3_size:
+    system.l3bus = L2XBar()
+    system.l2cache.connectMemSideBus(system.l3bus)
+    system.l3cache = L3Cache(args)
+    system.l3cache.connectCPUSideBus(system.l3bus)
+    system.l3cache.connectMemSideBus(system.membus)
+else:
+    system.l2cache.connectMemSideBus(system.membus)
 
 # Interrupts
-system.cpu.createInterruptController()
-system.cpu.interrupts[0].pio = system.membus.mem_side_ports
-system.cpu.interrupts[0].int_requestor = system.membus.cpu_side_ports
-system.cpu.interrupts[0].int_responder = system.membus.mem_side_ports
+for cpu in cpus:
+    cpu.createInterruptController()
+    cpu.interrupts[0].pio = system.membus.mem_side_ports
+    cpu.interrupts[0].int_requestor = system.membus.cpu_side_ports
+    cpu.interrupts[0].int_responder = system.membus.mem_side_ports
 
 # System port
 system.system_port = system.membus.cpu_side_ports
 
-# Memory controller
-system.mem_ctrl = MemCtrl()
-system.mem_ctrl.dram = DDR3_1600_8x8()
-system.mem_ctrl.dram.range = system.mem_ranges[0]
-system.mem_ctrl.port = system.membus.mem_side_ports
+# Memory controllers: one per channel, interleaved at cache-line
+# granularity (as in configs/common/MemConfig.py). A single channel keeps
+# the "system.mem_ctrl" stat names, N channels become mem_ctrl0 .. N-1
+mem_range = system.mem_ranges[0]
+intlv_bits = int(math.log2(args.mem_channels))
+intlv_low_bit = int(math.log2(system.cache_line_size.value))
+mem_ctrls = []
+for i in range(args.mem_channels):
+    ctrl = MemCtrl()
+    ctrl.dram = dram_class()
+    if args.mem_channels > 1:
+        ctrl.dram.range = AddrRange(mem_range.start, size=mem_range.size(),
+                                    intlvHighBit=intlv_low_bit + intlv_bits - 1,
+                                    xorHighBit=0, intlvBits=intlv_bits,
+                                    intlvMatch=i)
+    else:
+        ctrl.dram.range = mem_range
+    ctrl.port = system.membus.mem_side_ports
+    mem_ctrls.append(ctrl)
+system.mem_ctrl = mem_ctrls if args.mem_channels > 1 else mem_ctrls[0]
 
 # -----------------------------
 # Branch Predictor Setup
 # -----------------------------
-if args.bp_type == "LocalBP":
-    system.cpu.branchPred = LocalBP()
-elif args.bp_type == "TournamentBP":
-    system.cpu.branchPred = TournamentBP()
-elif args.bp_type == "BiModeBP":
-    system.cpu.branchPred = BiModeBP()
-elif args.bp_type == "TAGE":
-    system.cpu.branchPred = TAGE()
-elif args.bp_type == "LTAGE":
-    system.cpu.branchPred = LTAGE()
-elif args.bp_type == "GShareBP":
-    system.cpu.branchPred = GShareBP(historyBits=12, initCounter=1)
-elif args.bp_type == "PerceptronBP":
-    try:
-        system.cpu.branchPred = PerceptronBP()
-    except:
-        print("Warning: PerceptronBP not available in this gem5 build.")
-        system.cpu.branchPred = LocalBP()
+def makeBranchPred(bp_type):
+    """Return a new predictor of the given type, or None for the CPU default"""
+    if bp_type == "LocalBP":
+        return LocalBP()
+    elif bp_type == "TournamentBP":
+        return TournamentBP()
+    elif bp_type == "BiModeBP":
+        return BiModeBP()
+    elif bp_type == "TAGE":
+        return TAGE()
+    elif bp_type == "LTAGE":
+        return LTAGE()
+    elif bp_type == "GShareBP":
+        return GShareBP(historyBits=12, initCounter=1)
+    elif bp_type == "PerceptronBP":
+        try:
+            return PerceptronBP()
+        except:
+            print("Warning: PerceptronBP not available in this gem5 build.")
+            return LocalBP()
+    return None
+
+# option -> (child, SimObject class, parameter)
+TARGET_PARAMS = {
+    "btb_entries": ("btb", "SimpleBTB", "numEntries"),
+    "btb_assoc": ("btb", "SimpleBTB", "associativity"),
+    "btb_tag_bits": ("btb", "SimpleBTB", "tagBits"),
+    "ras_entries": ("ras", "ReturnAddrStack", "numEntries"),
+    "indirect_sets": ("indirectBranchPred", "SimpleIndirectPredictor", "indirectSets"),
+    "indirect_ways": ("indirectBranchPred", "SimpleIndirectPredictor", "indirectWays"),
+    "indirect_tag_bits": ("indirectBranchPred", "SimpleIndirectPredictor", "indirectTagSize"),
+    "indirect_path_length": ("indirectBranchPred", "SimpleIndirectPredictor", "indirectPathLength"),
+    "indirect_ghr_bits": ("indirectBranchPred", "SimpleIndirectPredictor", "indirectGHRBits"),
+}
+
+def applyTargetOpts(bp, opts):
+    """
+    Replace the BTB, RAS and indirect predictor of bp with instances sized
+    by the --btb_*, --ras_* and --indirect_* options. Only the structures
+    with at least one option set are replaced, so the others keep the
+    defaults of the predictor type.
+    """
+    kwargs = {}
+    for opt, (child, cls, param) in TARGET_PARAMS.items():
+        val = getattr(opts, opt)
+        if val is not None:
+            kwargs.setdefault((child, cls), {})[param] = val
+    for (child, cls), params in kwargs.items():
+        setattr(bp, child, getattr(m5.objects, cls)(**params))
+
+# One predictor instance per core
+for cpu in cpus:
+    bp = makeBranchPred(args.bp_type)
+    if bp is not None:
+        cpu.branchPred = bp
+    applyTargetOpts(cpu.branchPred, args)
 
 # -----------------------------
 # Workload setup
 # -----------------------------
 system.workload = SEWorkload.init_compatible(args.binary)
 process = Process()
-process.cmd = [args.binary]
-system.cpu.workload = process
-system.cpu.createThreads()
+process.cmd = [args.binary] + args.options.split()
+# All cores share one process; pthread_create() (clone) in SE mode
+# schedules new threads onto the idle thread contexts of the other cores
+for cpu in cpus:
+    cpu.workload = process
+    cpu.createThreads()
+
+# Instructions already committed before the checkpoint being restored
+start_insts = checkpoint_insts(args.restore_from) if args.restore_from else 0
 
-# Limit max instructions if specified
+# Limit max instructions if specified (counted from the restore point)
 if args.maxinsts:
-    system.cpu.max_insts_any_thread = args.maxinsts
+    for cpu in cpus:
+        cpu.max_insts_any_thread = max(args.maxinsts - start_insts, 1)
 
 # -----------------------------
 # Root and Simulation
 # -----------------------------
 root = Root(full_system=False, system=system)
-m5.instantiate()
+m5.instantiate(args.restore_from)
+
+outdir = m5.options.outdir
+
+# Committed-branch trace for the shadow predictors ("Commit branch" lines of
+# the Branch debug flag; needs a gem5.opt/debug build). With checkpoints each
+# gem5 process writes its own segment, replayed in order by shadow_bp.py.
+if shadow_bps:
+    m5.trace.output(segment_trace(start_insts) if args.checkpoint_interval else TRACE_FILE)
+    m5.debug.flags["Branch"].enable()
+insts_done = start_insts
+if args.checkpoint_interval:
+    cpus[0].scheduleInstStop(0, args.checkpoint_interval, "checkpoint")
 
 print("Beginning simulation!")
-exit_event = m5.simulate()
+while True:
+    exit_event = m5.simulate()
+    if exit_event.getCause() != "checkpoint":
+        break
+    insts_done += args.checkpoint_interval
+    # one stats dump per interval, so segments can be merged after a restore
+    m5.stats.dump()
+    m5.stats.reset()
+    # write under a temporary name so a kill never leaves a partial cpt.<N>
+    tmp_dir = os.path.join(outdir, "cpt.tmp")
+    cpt_dir = os.path.join(outdir, checkpoint_name(insts_done))
+    m5.checkpoint(tmp_dir)
+    if os.path.isdir(cpt_dir):
+        shutil.rmtree(cpt_dir)
+    os.rename(tmp_dir, cpt_dir)
+    rotate_checkpoints(outdir, args.keep_checkpoints)
+    print("Checkpoint at %i instructions" % insts_done)
+    cpus[0].scheduleInstStop(0, args.checkpoint_interval, "checkpoint")
 print("Exiting @ tick %i because %s" % (m5.curTick(), exit_event.getCause()))
@@ -1,4 +1,12 @@
-import os
+"""
+script.py
+
+Sweep settings for the branch-predictor study; the runs themselves are
+launched by bp_pipeline.sweep (see bp_pipeline for the Python API).
+"""
+import sys
+
+from bp_pipeline.sweep import Sweep, launch
 
 # Path to the gem5 binary (adjust if different on your system)
 gem5_path = "build/X86/gem5.opt"
@@ -24,34 +32,67 @@ workloads = [
     "Binaries/fft.1",            # another compute-heavy
 ]
 
+# Multi-core runs: core count -> pthread workloads (thread count = cores)
+# e.g. {4: ["Binaries/mm_mt", "Binaries/fft_mt"]}
+mt_workloads = {}
+
 # Max instructions per run (ROI)
 max_insts = 100_000_000   # 100M
 
-# Loop over configurations
-for cpu_type in cpu_types:
-    for bp_type in bp_types:
-        for workload in workloads:
-            # Extract workload name without path
-            workload_name = os.path.basename(workload)
-
-            # Create custom stats directory
-            custom_stats_dir = f"./Stats_BP/{cpu_type}_{bp_type}_{workload_name}"
-            os.makedirs(custom_stats_dir, exist_ok=True)
-
-            # Construct the gem5 command
-            cmd = [
-                gem5_path,
-                "-d", custom_stats_dir,
-                "config.py",
-                f"--cpu_type={cpu_type}",
-                f"--bp_type={bp_type}",
-                # f"--binary={workload}",
-                workload,
-                f"--maxinsts={max_insts}"
-            ]
-
-            # Print command for debugging
-            print("Running:", " ".join(cmd))
-
-            # Run the command
-            os.system(" ".join(cmd))
+# Periodic checkpoints: killed runs resume from the newest one and their
+# stats segments are merged into stats.txt (None runs without checkpoints)
+checkpoint_interval = None   # e.g. 10_000_000
+keep_checkpoints = 2
+max_restarts = 10
+
+# Shadow mode: each run also evaluates these predictors passively on the
+# committed branch stream (see shadow_bp.py), e.g. bp_types = ["LTAGE"] and
+# shadow_bps = ["LocalBP", "BiModeBP", "TournamentBP", "TAGE"]
+shadow_bps = []
+
+# Memory-system configurations: tag -> extra config.py arguments. A non-empty
+# tag is appended to the CPU part of the run folder, e.g. O3CPU+ddr4x2_TAGE_mm
+mem_configs = {
+    "": [],
+    # "ddr4x2": ["--mem_type=DDR4_2400_16x4", "--mem_channels=2"],
+    # "hbm": ["--mem_type=HBM_1000_4H_1x128", "--mem_channels=4"],
+    # "3ghz": ["--cpu_clock=3GHz"],
+}
+
+# Branch target structure sizes (BTB, RAS, indirect predictor), applied to
+# every bp_type and tagged like mem_configs, e.g. O3CPU+btb1k_TAGE_fft.1
+target_configs = {
+    "": [],
+    # "btb1k": ["--btb_entries=1024"],
+    # "btb16k4w": ["--btb_entries=16384", "--btb_assoc=4"],
+    # "ras4": ["--ras_entries=4"],
+    # "ras64": ["--ras_entries=64"],
+    # "ind1k": ["--indirect_sets=512", "--indirect_ways=2"],
+}
+
+# Host profiling: run gem5 under `perf record` and write the per-component
+# host-time breakdown to host_profile.txt next to stats.txt (needs Linux perf)
+host_profile = False
+
+# Print the gem5 commands without running them
+dry_run = False
+
+try:
+    sweep = Sweep(
+        bp_types=bp_types,
+        workloads=workloads,
+        cpu_types=cpu_types,
+        mt_workloads=mt_workloads,
+        max_insts=max_insts,
+        mem_configs=mem_configs,
+        target_configs=target_configs,
+        shadow_bps=shadow_bps,
+        checkpoint_interval=checkpoint_interval,
+        keep_checkpoints=keep_checkpoints,
+        max_restarts=max_restarts,
+        gem5_path=gem5_path,
+        host_profile=host_profile,
+    )
+except FileNotFoundError as e:  # host_profile without perf
+    print(e); sys.exit(1)
+launch(sweep, dry_run=dry_run)
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+shadow_bp.py
+
+Replay the committed-branch trace of gem5 runs made with --shadow_bp
+through Python models of other predictors and write <run>/shadow_stats.txt.
+The models and the replay live in bp_pipeline.shadow.
+
+Usage:
+  python3 shadow_bp.py Stats_BP/O3CPU_LTAGE_mm --predictors LocalBP,BiModeBP,TAGE
+"""
+import argparse
+
+from bp_pipeline.shadow import MODELS, replay_run
+
+parser = argparse.ArgumentParser()
+parser.add_argument("run_dir", nargs="+", help="Run directories (gem5 -d outdir) with a branch trace")
+parser.add_argument("--predictors", default="LocalBP,BiModeBP,TournamentBP,TAGE",
+                    help="Comma-separated shadow predictors (%s)" % ",".join(sorted(MODELS)))
+parser.add_argument("--timed", action="store_true",
+                    help="Also record the host time spent in each model")
+args = parser.parse_args()
+names = [n.strip() for n in args.predictors.split(",") if n.strip()]
+for d in args.run_dir:
+    replay_run(d, names, args.timed)